@@ -1,14 +1,23 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import numpy_financial as npf
 from datetime import datetime, timedelta
+from functools import lru_cache
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
 import plotly.express as px
 
 import plotly.io as pio
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; kernels then run as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+    prange = range
+
 # Consistent, clean default theme for all charts
 pio.templates.default = "plotly_white"
 try:
@@ -46,6 +55,44 @@ BASE_DEFAULTS = {
     "annual_rent_increase": 3.0,
 }
 
+_DAY_NS = 86_400 * 10**9
+_HALF_CENT = 0.005
+
+# Months between recurring extra payments (Every X Years is scaled by the interval)
+_EXTRA_STEP_MONTHS = {"Monthly": 1, "Quarterly": 3, "Annually": 12, "Every X Years": 12}
+
+# Loan Type labels indexed by the schedule's int8 loan-type codes
+_LOAN_TYPES = np.array(["Original", "Refinance"], dtype=object)
+
+# Per-period schedule columns rolled up into monthly/annual views
+_SCHEDULE_COLUMNS = [
+    "Date", "Payment", "Interest", "Principal", "Extra Principal Payments", "PMI", "Balance", "Loan Type", "Effective Rate (%)"
+]
+_SCHEDULE_AGG = {
+    "Payment": "sum",
+    "Interest": "sum",
+    "Principal": "sum",
+    "Extra Principal Payments": "sum",
+    "PMI": "sum",
+    "Balance": "last",
+    "Loan Type": "last",
+    "Effective Rate (%)": "last"
+}
+
+# Default variable-rate schedule template (years and offsets from the base rate)
+_YEARS_DEFAULT = np.array([1, 5, 10])
+_RATE_OFFSETS = np.array([0.0, 1.5, 2.0])
+
+# Plot-only dtypes for the per-payment amortization chart
+_PER_PAYMENT_PLOT_DTYPES = {"Principal": np.float32, "Interest": np.float32, "PMI": np.float32}
+
+# Shared chart chrome; set on each layout (not a plotly template, which the Streamlit theme overrides)
+_CHART_LAYOUT = dict(
+    plot_bgcolor="rgb(245, 245, 245)",
+    paper_bgcolor="rgb(245, 245, 245)",
+    legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+)
+
 # Custom CSS for styling
 st.markdown("""
 <style>
@@ -125,6 +172,14 @@ def thick_divider():
         unsafe_allow_html=True
     )
 
+@st.cache_data
+def _derived(purchase_price, down_payment, closing_costs, closing_costs_method, buy_points, points_cost, points_cost_method):
+    """Down payment %, base loan amount and displayed loan amount from primitive inputs."""
+    percent_down = (down_payment / purchase_price * 100) if purchase_price > 0 else 0
+    loan_amount = purchase_price - down_payment + (closing_costs if closing_costs_method == "Add to Loan Balance" else 0)
+    display_loan_amount = loan_amount + (points_cost if (buy_points and points_cost_method == "Add to Loan Balance") else 0)
+    return percent_down, loan_amount, display_loan_amount
+
 # Page Config
 st.set_page_config(page_title="Rent vs. Buy Decision Support Framework", layout="wide")
 st.title("Rent vs. Buy Decision Support Framework")
@@ -189,11 +244,9 @@ with st.container(border=True):
         down_payment = st.number_input("Down Payment ($)", value=st.session_state["down_payment"], step=1_000, min_value=0, max_value=purchase_price, help="Initial payment toward purchase price.")
         if down_payment > purchase_price:
             st.warning("Down payment cannot exceed purchase price.")
-        percent_down = (down_payment / purchase_price * 100) if purchase_price > 0 else 0
-        st.metric("Down Payment Percentage", f"{percent_down:.2f}%")
+        percent_down_slot = st.empty()
         closing_costs = st.number_input("Closing Costs ($)", value=st.session_state["closing_costs"], step=500, min_value=0, help="One-time costs at purchase (e.g., fees, title).")
         closing_costs_method = st.selectbox("Closing Costs Method", ["Add to Loan Balance", "Pay Upfront"], index=0, help="Finance closing costs or pay upfront.")
-        loan_amount = purchase_price - down_payment + (closing_costs if closing_costs_method == "Add to Loan Balance" else 0)
 
     with col2:
         loan_years = st.number_input("Loan Length (Years)", value=st.session_state["loan_years"], step=1, min_value=1, max_value=50, help="Duration of the mortgage.")
@@ -219,12 +272,15 @@ with st.container(border=True):
             st.metric("Points Cost", f"${points_cost:,.0f}")
 
     # Now calculate loan amount display (after points vars exist)
-    display_loan_amount = loan_amount + (points_cost if (buy_points and points_cost_method == "Add to Loan Balance") else 0)
+    percent_down, loan_amount, display_loan_amount = _derived(
+        purchase_price, down_payment, closing_costs, closing_costs_method, buy_points, points_cost, points_cost_method
+    )
+    percent_down_slot.metric("Down Payment Percentage", f"{percent_down:.2f}%")
     st.metric("Calculated Loan Amount", f"${display_loan_amount:,.0f}", help="Includes financed closing costs and financed points when applicable.")
 
     if mortgage_type == "Variable":
         st.markdown("### Variable Rate Schedule")
-        default_schedule = pd.DataFrame({"Year": [1, 5, 10], "Rate (%)": [mortgage_rate, mortgage_rate + 1.5, mortgage_rate + 2.0]})
+        default_schedule = pd.DataFrame({"Year": _YEARS_DEFAULT, "Rate (%)": mortgage_rate + _RATE_OFFSETS})
         rate_schedule = st.data_editor(
             default_schedule,
             column_config={
@@ -241,13 +297,13 @@ with st.container(border=True):
     st.markdown("### Extra Principal Payments")
     st.markdown("Add extra payments to reduce your mortgage principal faster. Ensure all required fields are filled to avoid errors.")
     default_payments = pd.DataFrame({
-        "Amount ($)": [200, 10000],
-        "Frequency": ["Monthly", "One-time"],
-        "Start Year": [purchase_year, purchase_year + 5],
-        "Start Month": [1, 6],
-        "End Year": [purchase_year + 5, purchase_year + 5],
-        "End Month": [12, 6],
-        "Interval (Years)": [None, None]
+        "Amount ($)": np.array([200, 10000], dtype=np.int64),
+        "Frequency": np.array(["Monthly", "One-time"], dtype=object),
+        "Start Year": np.array([purchase_year, purchase_year + 5], dtype=np.int64),
+        "Start Month": np.array([1, 6], dtype=np.int64),
+        "End Year": np.array([purchase_year + 5, purchase_year + 5], dtype=np.int64),
+        "End Month": np.array([12, 6], dtype=np.int64),
+        "Interval (Years)": np.full(2, np.nan)
     })
     extra_payments = st.data_editor(
         default_payments,
@@ -329,7 +385,7 @@ with st.expander("Refinance", expanded=False):
 
         if refi_mortgage_type == "Variable":
             st.markdown("### Refinance Variable Rate Schedule")
-            default_refi_schedule = pd.DataFrame({"Year": [1, 5, 10], "Rate (%)": [refi_effective_rate, refi_effective_rate + 1.5, refi_effective_rate + 2.0]})
+            default_refi_schedule = pd.DataFrame({"Year": _YEARS_DEFAULT, "Rate (%)": refi_effective_rate + _RATE_OFFSETS})
             refi_rate_schedule = st.data_editor(
                 default_refi_schedule,
                 column_config={
@@ -374,10 +430,10 @@ with st.expander("Homeownership Expenses (click to expand)", expanded=False):
             st.markdown("**One-Time Expenses**")
             st.markdown("Enter one-time emergency repair costs.")
             default_emergency_expenses = pd.DataFrame({
-                "Category": ["Appliance Replacement", "Septic Repair", "Roof Repair"],
-                "Amount ($)": [1500, 8000, 12000],
-                "Year": [purchase_year + 1, purchase_year + 5, purchase_year + 10],
-                "Month": [5, 7, 9]
+                "Category": np.array(["Appliance Replacement", "Septic Repair", "Roof Repair"], dtype=object),
+                "Amount ($)": np.array([1500, 8000, 12000], dtype=np.int64),
+                "Year": np.array([purchase_year + 1, purchase_year + 5, purchase_year + 10], dtype=np.int64),
+                "Month": np.array([5, 7, 9], dtype=np.int64)
             })
             edited_emergency_expenses = st.data_editor(
                 default_emergency_expenses,
@@ -446,6 +502,9 @@ def expand_extra_payments(df, start_year, loan_years, frequency):
     n_payments = loan_years * periods_per_year
     delta = pd.DateOffset(months=1) if frequency == "Monthly" else timedelta(days=14)
     payment_dates = [start_date + i * delta for i in range(n_payments)]
+    payments_by_month = {}
+    for pdate in payment_dates:
+        payments_by_month.setdefault((pdate.year, pdate.month), []).append(pdate)
 
     # Filter out rows with any NaN in required columns
     required_columns = ["Amount ($)", "Frequency", "Start Year", "Start Month", "End Year", "End Month"]
@@ -465,25 +524,17 @@ def expand_extra_payments(df, start_year, loan_years, frequency):
             if amt <= 0 or start_y < start_year or start_y > start_year + loan_years or start_m < 1 or start_m > 12 or end_y < start_y or end_y > start_year + loan_years or end_m < 1 or end_m > 12:
                 continue  # Skip invalid rows
 
-            extra_dates = []
             if freq == "One-time":
-                extra_dates.append(datetime(start_y, start_m, 1))
+                extra_dates = [datetime(start_y, start_m, 1)]
+            elif freq in _EXTRA_STEP_MONTHS:
+                # Month starts from the start month through the end month
+                step = _EXTRA_STEP_MONTHS[freq] * interval
+                extra_dates = pd.date_range(datetime(start_y, start_m, 1), datetime(end_y, end_m, 28), freq=f"{step}MS")
             else:
-                current = datetime(start_y, start_m, 1)
-                end = datetime(end_y, end_m, 28)
-                while current <= end:
-                    extra_dates.append(current)
-                    if freq == "Monthly":
-                        current += pd.DateOffset(months=1)
-                    elif freq == "Quarterly":
-                        current += pd.DateOffset(months=3)
-                    elif freq == "Annually":
-                        current += pd.DateOffset(years=1)
-                    elif freq == "Every X Years":
-                        current += pd.DateOffset(years=interval)
+                continue
 
             for apply_date in extra_dates:
-                matching_dates = [pdate for pdate in payment_dates if pdate.year == apply_date.year and pdate.month == apply_date.month]
+                matching_dates = payments_by_month.get((apply_date.year, apply_date.month), [])
                 if matching_dates:
                     if freq == "Monthly" and frequency == "Biweekly" and len(matching_dates) > 1:
                         split_amt = amt / len(matching_dates)
@@ -497,7 +548,199 @@ def expand_extra_payments(df, start_year, loan_years, frequency):
 
     return extra_schedule
 
-@st.cache_data
+@njit(cache=True)
+def _pmt_scalar(rate, nper, pv):
+    """Scalar npf.pmt (payment at period end, no future value)."""
+    if rate == 0:
+        return -pv / nper
+    temp = (1 + rate) ** nper
+    return -(pv * temp) / ((temp - 1) / rate)
+
+def _rate_table(rate_schedule, fallback_rate):
+    """Annual rate (decimal) indexed by loan year; years past the table use its last entry."""
+    years = rate_schedule["Year"].to_numpy(dtype=float)
+    rates = rate_schedule["Rate (%)"].to_numpy(dtype=float) / 100
+    order = np.argsort(years, kind="stable")
+    years, rates = years[order], rates[order]
+    known_years = years[np.isfinite(years)]
+    last_year = int(max(known_years.max(), 1)) if known_years.size else 1
+    idx = np.searchsorted(years, np.arange(last_year + 1), side="right") - 1
+    return np.where(idx >= 0, rates[np.maximum(idx, 0)], fallback_rate)
+
+def _extras_lookup(extra_schedule):
+    """Extra payment dates (ns, sorted), amounts and original dict order."""
+    dates = np.array(list(extra_schedule.keys()), dtype="datetime64[ns]").astype(np.int64)
+    amounts = np.fromiter(extra_schedule.values(), dtype=float, count=len(extra_schedule))
+    order = np.argsort(dates, kind="stable")
+    return dates[order], amounts[order], order
+
+def _nearest_extras(dates, amounts, order, when, tolerance_days):
+    """Per-period amount of the closest extra payment to each `when` (ns) within tolerance, else 0."""
+    i = np.searchsorted(dates, when)
+    lo = np.clip(i - 1, 0, len(dates) - 1)
+    hi = np.clip(i, 0, len(dates) - 1)
+    gap_lo = np.abs((dates[lo] - when) // _DAY_NS)
+    gap_hi = np.abs((dates[hi] - when) // _DAY_NS)
+    # Equal gaps resolve to the earlier dict entry, as min() over the keys did
+    use_hi = (i == 0) | ((i < len(dates)) & ((gap_hi < gap_lo) | ((gap_hi == gap_lo) & (order[hi] < order[lo]))))
+    gap = np.where(use_hi, gap_hi, gap_lo)
+    return np.where(gap <= tolerance_days, amounts[np.where(use_hi, hi, lo)], 0.0)
+
+def _period_dates(start_date, n_periods, periods_per_year):
+    """Payment dates matching start_date + n * delta for monthly or 14-day periods."""
+    if periods_per_year != 12:
+        return pd.date_range(start_date, periods=n_periods, freq="14D")
+    months = np.datetime64(start_date.strftime("%Y-%m"), "M") + np.arange(n_periods)
+    month_start = months.astype("datetime64[D]")
+    days_in_month = ((months + 1).astype("datetime64[D]") - month_start).astype(int)
+    days = month_start + np.minimum(start_date.day, days_in_month) - 1
+    return pd.DatetimeIndex(days) + (start_date - start_date.normalize())
+
+def _pmi_due(principal, r, payment, opening, pmi_equity_threshold, purchase_price):
+    """Per-period PMI mask; the cutoff where equity reaches the threshold is solved from the annuity balance.
+
+    Neighbouring periods are checked with the per-period equity test so float error cannot shift it.
+    """
+    n = len(opening)
+
+    def due(t):
+        equity = (purchase_price - opening[t]) / purchase_price * 100 if purchase_price > 0 else 0
+        return equity < pmi_equity_threshold
+
+    if purchase_price <= 0:
+        return np.full(n, n > 0 and due(0))
+    if payment <= r * principal or payment <= 0:
+        # Balance never falls, so there is no single cutoff
+        return (purchase_price - opening) / purchase_price * 100 < pmi_equity_threshold
+    target = purchase_price * (1 - pmi_equity_threshold / 100)
+    if principal <= target:
+        t = 0
+    elif r:
+        t = np.ceil(np.log((payment - r * target) / (payment - r * principal)) / np.log1p(r))
+    else:
+        t = np.ceil((principal - target) / payment)
+    t = int(min(max(t, 0), n))
+    while t > 0 and not due(t - 1):
+        t -= 1
+    while t < n and due(t):
+        t += 1
+    return np.arange(n) < t
+
+def _fixed_rate_schedule(principal, n_periods, periods_per_year, start_date, annual_rate, payment,
+                         pmi_rate, pmi_equity_threshold, purchase_price):
+    """Closed-form schedule for a single fixed rate with no extra payments or refinance."""
+    r = annual_rate / periods_per_year
+    t = np.arange(n_periods + 1)
+    if r:
+        growth = (1 + r) ** t
+        balance = principal * growth - payment * (growth - 1) / r
+    else:
+        balance = principal - payment * t
+    # Same payoff rule as the kernel: a closing balance under half a cent ends the loan
+    paid_off = np.flatnonzero(balance[1:] < _HALF_CENT)
+    n = paid_off[0] + 1 if paid_off.size else n_periods
+
+    opening = balance[:n]
+    interest = opening * r
+    principal_paid = payment - interest
+    payments = np.full(n, payment)
+    closing = balance[1:n + 1].copy()
+    if paid_off.size:
+        # Final payment only covers what is left
+        principal_paid[-1] = opening[-1]
+        payments[-1] = opening[-1] + interest[-1]
+        closing[-1] = 0.0
+
+    pmi_due = _pmi_due(principal, r, payment, opening, pmi_equity_threshold, purchase_price)
+    pmi = np.where(pmi_due, round(principal * pmi_rate / 100 / 12, 2), 0.0)
+
+    return pd.DataFrame({
+        "Date": _period_dates(start_date, n, periods_per_year),
+        "Payment": np.round(payments, 2),
+        "Interest": np.round(interest, 2),
+        "Principal": np.round(principal_paid, 2),
+        "Extra Principal Payments": np.zeros(n),
+        "PMI": pmi,
+        "Balance": np.round(closing, 2),
+        "Loan Type": "Original",
+        "Effective Rate (%)": round(annual_rate * 100, 2)
+    })
+
+@njit(cache=True, error_model="numpy")
+def _amort_kernel(balance, payment, refi_at, refi_principal, refi_payment, periodic_rates, monthly_rates,
+                  periods_per_year, variable, term_periods, extras, pmi_payment, pmi_equity_threshold, purchase_price,
+                  start=0):
+    """Period-by-period amortization on precomputed per-period terms from `start`; stops at payoff. Outputs are unrounded."""
+    n_periods = len(periodic_rates)
+    payment_a = np.empty(n_periods - start)
+    interest_a = np.empty(n_periods - start)
+    principal_a = np.empty(n_periods - start)
+    pmi_a = np.empty(n_periods - start)
+    balance_a = np.empty(n_periods - start)
+    count = n_periods - start
+    for n in range(start, n_periods):
+        if n == refi_at:
+            balance = refi_principal
+            payment = refi_payment
+        ppy = periods_per_year[n]
+
+        if variable[n] and n > 0:
+            monthly_payment = _pmt_scalar(monthly_rates[n], (term_periods[n] - n) / (ppy / 12), -balance)
+            payment = monthly_payment if ppy == 12 else monthly_payment * 12 / 26
+
+        equity = (purchase_price - balance) / purchase_price * 100 if purchase_price > 0 else 0.0
+        pmi = pmi_payment if equity < pmi_equity_threshold else 0.0
+        extra = extras[n]
+
+        interest = balance * periodic_rates[n]
+        principal_paid = payment - interest
+        # Anything within half a cent of the balance pays the loan off
+        if principal_paid + extra > balance - _HALF_CENT:
+            principal_paid = balance - extra
+            payment = principal_paid + interest
+            balance = 0.0
+        else:
+            balance -= principal_paid + extra
+
+        i = n - start
+        payment_a[i] = payment
+        interest_a[i] = interest
+        principal_a[i] = principal_paid
+        pmi_a[i] = pmi
+        balance_a[i] = balance
+        if balance <= 0:
+            count = i + 1
+            break
+    return payment_a[:count], interest_a[:count], principal_a[:count], pmi_a[:count], balance_a[:count]
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _mc_paths_kernel(bro, hom, buy_cost, rent_cost, balance, home_value0, rent_investment0):
+    """Buy/Rent total-asset paths (trials x years) from per-trial brokerage and housing returns.
+
+    Costs and balances are per year and shared by every trial; each year the side with the lower
+    cost invests the difference, and both brokerage accounts grow with the same draw.
+    """
+    n_trials, n_years = bro.shape
+    buy_paths = np.empty((n_trials, n_years))
+    rent_paths = np.empty((n_trials, n_years))
+    for t in prange(n_trials):
+        home_value = home_value0
+        buy_investment = 0.0
+        rent_investment = rent_investment0
+        for i in range(n_years):
+            home_value *= 1.0 + hom[t, i]
+            growth = 1.0 + bro[t, i]
+            buy_investment *= growth
+            rent_investment *= growth
+            if buy_cost[i] > rent_cost[i]:
+                rent_investment += buy_cost[i] - rent_cost[i]
+            else:
+                buy_investment += rent_cost[i] - buy_cost[i]
+            equity_total = home_value0 - balance[i] + max(home_value - home_value0, 0.0)
+            buy_paths[t, i] = equity_total + buy_investment
+            rent_paths[t, i] = rent_investment
+    return buy_paths, rent_paths
+
 def amortization_schedule(
     principal,
     years,
@@ -517,13 +760,17 @@ def amortization_schedule(
     refi_periods_per_year=None,
     refi_rate_schedule=None,
     refi_mortgage_type="Fixed",
-    refi_mortgage_rate=None
+    refi_mortgage_rate=None,
+    pre_refi_schedule=None
 ):
-    balance = principal
+    """Per-period, monthly and annual amortization frames.
+
+    `pre_refi_schedule` is a per-period schedule on the same dates, extras and rates without the
+    refinance; its rows before the refinance switch are reused instead of re-running them.
+    """
     start_date = pd.to_datetime(start_date)
     refi_start_date = pd.to_datetime(refi_start_date) if refi_start_date else None
     extra_schedule = extra_schedule or {}
-    schedule = []
 
     if mortgage_type == "Fixed":
         rate_schedule = pd.DataFrame({"Year": [1], "Rate (%)": [mortgage_rate]})
@@ -552,102 +799,176 @@ def amortization_schedule(
         refi_start_period = int(((refi_start_date - start_date).days / 365.25) * periods_per_year)
         n_periods = max(n_periods, refi_start_period + refi_years * refi_periods_per_year)
 
-    delta = pd.DateOffset(months=1) if periods_per_year == 12 else timedelta(days=14)
-    refi_delta = pd.DateOffset(months=1) if refi_periods_per_year == 12 else timedelta(days=14) if refi_periods_per_year else delta
-
+    rate_table = _rate_table(rate_schedule, mortgage_rate / 100)
     year_elapsed = max(1, start_date.year - purchase_year + 1)
-    applicable_rates = rate_schedule[rate_schedule["Year"] <= year_elapsed].sort_values("Year")
-    current_rate = applicable_rates["Rate (%)"].iloc[-1] / 100 if not applicable_rates.empty else mortgage_rate / 100
-    monthly_payment = npf.pmt(current_rate / 12, years * 12, -principal)
+    current_rate = rate_table[min(year_elapsed, len(rate_table) - 1)]
+    monthly_payment = _pmt_scalar(current_rate / 12, years * 12, -principal)
     payment = round(monthly_payment, 2) if periods_per_year == 12 else round(monthly_payment * 12 / 26, 2)
 
-    is_refinanced = False
-    refi_start_period = 0
-    for n in range(n_periods):
-        current_date = start_date + (n * delta) if not is_refinanced else refi_start_date + (n - refi_start_period) * refi_delta
-        year_elapsed = max(1, current_date.year - purchase_year + 1)
+    if mortgage_type == "Fixed" and not extra_schedule and not refi_start_date:
+        df = _fixed_rate_schedule(
+            principal, n_periods, periods_per_year, start_date, current_rate, payment,
+            pmi_rate, pmi_equity_threshold, purchase_price
+        )
+        return _summarize_schedule(df)
+
+    # Original payment dates up to the first one on/after the refinance date, then the refinance cadence
+    dates = _period_dates(start_date, n_periods, periods_per_year)
+    refi_at = int(np.searchsorted(dates, refi_start_date)) if refi_start_date else n_periods
+    if refi_at < n_periods:
+        refi_dates = _period_dates(refi_start_date, n_periods - refi_at, refi_periods_per_year or periods_per_year)
+        dates = dates[:refi_at + 1].append(refi_dates[1:])
+    else:
+        refi_at = -1
+    dates = dates.values.astype("datetime64[ns]")
+    refinanced = np.arange(n_periods) >= refi_at if refi_at >= 0 else np.zeros(n_periods, dtype=bool)
+    loan_type = refinanced.astype(np.int8)
+
+    calendar_years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    year_elapsed = np.maximum(1, calendar_years - purchase_year + 1)
+    rates = rate_table[np.minimum(year_elapsed, len(rate_table) - 1)]
+    period_counts = np.full(n_periods, periods_per_year)
+    variable = np.full(n_periods, mortgage_type == "Variable")
+    term_periods = np.full(n_periods, years * periods_per_year)
+    refi_payment = 0.0
+    if refi_at >= 0:
+        # Refinanced periods count loan years from the refinance year; the switch period is year 1
+        year_elapsed[refinanced] = np.maximum(1, calendar_years[refinanced] - refi_start_date.year + 1)
+        year_elapsed[refi_at] = 1
+        refi_rate_table = _rate_table(refi_rate_schedule, refi_mortgage_rate / 100 if refi_mortgage_rate else mortgage_rate / 100)
+        rates[refinanced] = refi_rate_table[np.minimum(year_elapsed[refinanced], len(refi_rate_table) - 1)]
+        period_counts[refinanced] = refi_periods_per_year
+        variable[refinanced] = refi_mortgage_type == "Variable"
+        term_periods[refinanced] = refi_years * refi_periods_per_year
+        refi_monthly = _pmt_scalar(refi_rate_table[min(1, len(refi_rate_table) - 1)] / 12, refi_years * 12, -refi_principal)
+        refi_payment = round(refi_monthly, 2) if refi_periods_per_year == 12 else round(refi_monthly * 12 / 26, 2)
+
+    extras = np.zeros(n_periods)
+    if extra_schedule:
+        extra_dates, extra_amounts, extra_order = _extras_lookup(extra_schedule)
+        extras = _nearest_extras(
+            extra_dates, extra_amounts, extra_order,
+            dates.astype(np.int64), np.where(period_counts == 12, 30, 14)
+        )
+
+    # Up to the refinance switch the schedule matches the original loan's
+    shared = 0
+    if pre_refi_schedule is not None and refi_at > 0:
+        if len(pre_refi_schedule) <= refi_at and pre_refi_schedule["Balance"].iloc[-1] <= 0:
+            return _summarize_schedule(pre_refi_schedule)
+        if len(pre_refi_schedule) >= refi_at:
+            shared = refi_at
+
+    payments, interest, principal_paid, pmi, balance = _amort_kernel(
+        float(principal), float(payment), refi_at, float(refi_principal or 0.0), float(refi_payment),
+        rates / period_counts, rates / 12, period_counts, variable, term_periods, extras,
+        round((principal * pmi_rate / 100 / 12), 2), float(pmi_equity_threshold), float(purchase_price),
+        shared
+    )
+    if shared:
+        shared_rows = pre_refi_schedule.iloc[:shared]
+        payments = np.concatenate([shared_rows["Payment"].to_numpy(), payments])
+        interest = np.concatenate([shared_rows["Interest"].to_numpy(), interest])
+        principal_paid = np.concatenate([shared_rows["Principal"].to_numpy(), principal_paid])
+        pmi = np.concatenate([shared_rows["PMI"].to_numpy(), pmi])
+        balance = np.concatenate([shared_rows["Balance"].to_numpy(), balance])
+    n = len(balance)
+
+    return _summarize_schedule(pd.DataFrame({
+        "Date": dates[:n],
+        "Payment": np.round(payments, 2),
+        "Interest": np.round(interest, 2),
+        "Principal": np.round(principal_paid, 2),
+        "Extra Principal Payments": extras[:n],
+        "PMI": pmi,
+        "Balance": np.round(balance, 2),
+        "Loan Type": _LOAN_TYPES[loan_type[:n]],
+        "Effective Rate (%)": np.round(rates[:n] * 100, 2)
+    }))
+
+def _summarize_schedule(df):
+    """Roll a per-period schedule up into (per-period, monthly, annual) frames; the annual one carries running totals."""
+    years = df["Date"].dt.year.to_numpy()
+    month_key = years * 12 + df["Date"].dt.month.to_numpy() - 1
+
+    df_monthly = df.groupby(month_key).agg(_SCHEDULE_AGG).reset_index(drop=True)
+    months = np.unique(month_key)
+    df_monthly.insert(0, "Date", pd.to_datetime({"year": months // 12, "month": months % 12 + 1, "day": 1}))
+
+    df_annual = df.groupby(years).agg(_SCHEDULE_AGG).reset_index(drop=True)
+    annual_years = np.unique(years)
+    df_annual.insert(0, "Date", pd.to_datetime({"year": annual_years, "month": 1, "day": 1}))
+    df_annual.insert(1, "Year", annual_years.astype(np.int32))
+    df_annual = df_annual.join(df_annual[["Principal", "Interest", "PMI"]].cumsum().add_prefix("Cum "))
 
-        if refi_start_date and current_date >= refi_start_date and not is_refinanced:
-            is_refinanced = True
-            balance = refi_principal
-            periods_per_year = refi_periods_per_year
-            rate_schedule = refi_rate_schedule
-            mortgage_type = refi_mortgage_type
-            purchase_year = refi_start_date.year
-            refi_start_period = n
-            year_elapsed = 1
-            applicable_rates = rate_schedule[rate_schedule["Year"] <= year_elapsed].sort_values("Year")
-            current_rate = applicable_rates["Rate (%)"].iloc[-1] / 100 if not applicable_rates.empty else refi_mortgage_rate / 100 if refi_mortgage_rate else mortgage_rate / 100
-            monthly_payment = npf.pmt(current_rate / 12, refi_years * 12, -refi_principal)
-            payment = round(monthly_payment, 2) if periods_per_year == 12 else round(monthly_payment * 12 / 26, 2)
-
-        applicable_rates = rate_schedule[rate_schedule["Year"] <= year_elapsed].sort_values("Year")
-        current_rate = applicable_rates["Rate (%)"].iloc[-1] / 100 if not applicable_rates.empty else (refi_mortgage_rate / 100 if is_refinanced and refi_mortgage_rate else mortgage_rate / 100)
-
-        if mortgage_type == "Variable" and n > 0:
-            remaining_periods = (years if not is_refinanced else refi_years) * periods_per_year - n
-            monthly_payment = npf.pmt(current_rate / 12, remaining_periods / (periods_per_year / 12), -balance)
-            payment = round(monthly_payment, 2) if periods_per_year == 12 else round(monthly_payment * 12 / 26, 2)
-
-        equity = (purchase_price - balance) / purchase_price * 100 if purchase_price > 0 else 0
-        pmi_payment = round((principal * pmi_rate / 100 / 12), 2) if equity < pmi_equity_threshold else 0
-
-        extra = 0
-        if extra_schedule:
-            closest_date = min(extra_schedule.keys(), key=lambda x: abs((x - current_date).days), default=None)
-            if closest_date and abs((closest_date - current_date).days) <= (30 if periods_per_year == 12 else 14):
-                extra = extra_schedule.get(closest_date, 0)
-
-        interest = round(balance * (current_rate / periods_per_year), 2)
-        principal_paid = round(payment - interest, 2)
-
-        if principal_paid + extra > balance:
-            principal_paid = round(balance - extra, 2)
-            payment = round(principal_paid + interest, 2)
-
-        balance = round(balance - (principal_paid + extra), 2)
-
-        schedule.append({
-            "Date": current_date,
-            "Payment": payment,
-            "Interest": interest,
-            "Principal": principal_paid,
-            "Extra Principal Payments": extra,
-            "PMI": pmi_payment,
-            "Balance": balance,
-            "Loan Type": "Refinance" if is_refinanced else "Original",
-            "Effective Rate (%)": round(current_rate * 100, 2)
-        })
+    return df, df_monthly, df_annual
 
-        if balance <= 0:
-            break
+def _extras_key(extra_schedule):
+    """Hashable (ns, amount) pairs; dict order is kept since nearest-date ties follow it."""
+    return tuple((pd.Timestamp(when).value, float(amount)) for when, amount in (extra_schedule or {}).items())
 
-    df = pd.DataFrame(schedule)
-    df_monthly = df.groupby(df["Date"].dt.to_period("M")).agg({
-        "Payment": "sum",
-        "Interest": "sum",
-        "Principal": "sum",
-        "Extra Principal Payments": "sum",
-        "PMI": "sum",
-        "Balance": "last",
-        "Loan Type": "last",
-        "Effective Rate (%)": "last"
-    }).reset_index()
-    df_monthly["Date"] = df_monthly["Date"].dt.to_timestamp()
-
-    df_annual = df.groupby(df["Date"].dt.to_period("Y")).agg({
-        "Payment": "sum",
-        "Interest": "sum",
-        "Principal": "sum",
-        "Extra Principal Payments": "sum",
-        "PMI": "sum",
-        "Balance": "last",
-        "Loan Type": "last",
-        "Effective Rate (%)": "last"
-    }).reset_index()
-    df_annual["Date"] = df_annual["Date"].dt.to_timestamp()
+def _rates_key(rate_schedule):
+    """Hashable (Year, Rate (%)) pairs, or None when there is no schedule."""
+    if rate_schedule is None:
+        return None
+    return tuple(zip(rate_schedule["Year"].tolist(), rate_schedule["Rate (%)"].tolist()))
 
-    return df, df_monthly, df_annual
+def _rates_frame(rates_key):
+    return None if rates_key is None else pd.DataFrame(list(rates_key), columns=["Year", "Rate (%)"])
+
+@st.cache_data(show_spinner=False)
+def amortization_schedule_cached(
+    principal,
+    years,
+    periods_per_year=12,
+    start_date="2025-01-01",
+    extras_key=(),
+    rates_key=None,
+    mortgage_type="Fixed",
+    purchase_year=2025,
+    mortgage_rate=5.0,
+    pmi_rate=0.0,
+    pmi_equity_threshold=20.0,
+    purchase_price=500_000,
+    refi_start_date=None,
+    refi_principal=None,
+    refi_years=None,
+    refi_periods_per_year=None,
+    refi_rates_key=None,
+    refi_mortgage_type="Fixed",
+    refi_mortgage_rate=None,
+    share_pre_refi=False
+):
+    """amortization_schedule keyed on _extras_key/_rates_key tuples so cache lookups hash plain tuples.
+
+    With `share_pre_refi`, a monthly refinanced schedule reuses the (cached) schedule of the same loan
+    without the refinance for its pre-refinance periods.
+    """
+    pre_refi_schedule = None
+    if share_pre_refi and refi_start_date and periods_per_year == 12:
+        pre_refi_schedule = amortization_schedule_cached(
+            principal, years, 12, start_date, extras_key, rates_key, mortgage_type, purchase_year,
+            mortgage_rate, pmi_rate, pmi_equity_threshold, purchase_price
+        )[0]
+    return amortization_schedule(
+        principal, years, periods_per_year, start_date,
+        extra_schedule={pd.Timestamp(when): amount for when, amount in extras_key},
+        rate_schedule=_rates_frame(rates_key),
+        mortgage_type=mortgage_type,
+        purchase_year=purchase_year,
+        mortgage_rate=mortgage_rate,
+        pmi_rate=pmi_rate,
+        pmi_equity_threshold=pmi_equity_threshold,
+        purchase_price=purchase_price,
+        refi_start_date=refi_start_date,
+        refi_principal=refi_principal,
+        refi_years=refi_years,
+        refi_periods_per_year=refi_periods_per_year,
+        refi_rate_schedule=_rates_frame(refi_rates_key),
+        refi_mortgage_type=refi_mortgage_type,
+        refi_mortgage_rate=refi_mortgage_rate,
+        pre_refi_schedule=pre_refi_schedule
+    )
 
 @st.cache_data
 def calculate_cost_comparison(
@@ -684,121 +1005,118 @@ def calculate_cost_comparison(
     vti_annual_return=7.0,
     down_payment=0
 ):
-    years = range(eval_start_year, eval_end_year + 1)
-    comparison_data = []
-    cumulative_buy = 0
-    cumulative_rent = 0
+    years = np.arange(eval_start_year, eval_end_year + 1)
+    n_years = len(years)
+    year_idx = years - purchase_year
+    step = np.arange(n_years)
+    is_purchase = years == purchase_year
+    is_refi = years == refi_start_date.year if show_refinance and refi_start_date else np.zeros(n_years, dtype=bool)
     taxes = edited_property_expenses[edited_property_expenses["Category"] == "Property Taxes"]["Amount ($)"].iloc[0] if "Property Taxes" in edited_property_expenses["Category"].values else 0
     insurance = edited_property_expenses[edited_property_expenses["Category"] == "Home Insurance"]["Amount ($)"].iloc[0] if "Home Insurance" in edited_property_expenses["Category"].values else 0
     maintenance = edited_property_expenses[edited_property_expenses["Category"] == "Routine Maintenance"]["Amount ($)"].iloc[0] if "Routine Maintenance" in edited_property_expenses["Category"].values else 0
     hoa = edited_property_expenses[edited_property_expenses["Category"] == "HOA Fees"]["Amount ($)"].iloc[0] if "HOA Fees" in edited_property_expenses["Category"].values else 0
-    current_rent = cost_of_rent
-    current_renters_insurance = renters_insurance
-    current_deposit = security_deposit
-    current_utilities = rental_utilities
-    current_pet_fee = pet_fee
-    current_parking = parking_fee
-    home_value = purchase_price
-    base_home_value = purchase_price
-    buy_investment = 0
-    rent_investment = down_payment + security_deposit
-
-    for year in years:
-        year_idx = year - purchase_year
-        if year <= purchase_year + loan_years and year in annual_df["Date"].dt.year.values:
-            p_and_i = annual_df[annual_df["Date"].dt.year == year]["Payment"].sum() + annual_df[annual_df["Date"].dt.year == year]["Extra Principal Payments"].sum()
-            pmi = annual_df[annual_df["Date"].dt.year == year]["PMI"].sum()
-            year_balance = annual_df[annual_df["Date"].dt.year == year]["Balance"].iloc[-1]
-        else:
-            p_and_i = 0
-            pmi = 0
-            year_balance = 0
-
-        year_taxes = taxes * (1 + annual_property_tax_increase / 100) ** year_idx
-        year_insurance = insurance * (1 + annual_insurance_increase / 100) ** year_idx
-        year_maintenance = maintenance * (1 + annual_maintenance_increase / 100) ** year_idx
-        year_hoa = hoa * (1 + annual_hoa_increase / 100) ** year_idx
-        year_emergency = edited_emergency_expenses[edited_emergency_expenses["Year"] == year]["Amount ($)"].sum() if not edited_emergency_expenses.empty else 0
-        year_closing = (closing_costs if year == purchase_year and closing_costs_method == "Pay Upfront" else 0) + (refi_costs if show_refinance and refi_start_date and refi_start_date.year == year and roll_costs == "Pay Upfront" else 0)
-        year_points = (points_cost if year == purchase_year and points_cost_method == "Pay Upfront" else 0) + (refi_points_cost if show_refinance and refi_start_date and refi_start_date.year == year and refi_points_cost_method == "Pay Upfront" else 0)
-        financing_method = (
-            f"{'Closing: Upfront' if year == purchase_year and closing_costs_method == 'Pay Upfront' else 'Closing: Financed' if year == purchase_year else ''}"
-            f"{'; ' if year == purchase_year and points_cost_method == 'Pay Upfront' else ''}{'Points: Upfront' if year == purchase_year and points_cost_method == 'Pay Upfront' else 'Points: Financed' if year == purchase_year else ''}"
-            f"{'; ' if show_refinance and refi_start_date and refi_start_date.year == year else ''}{'Refi Closing: Upfront' if show_refinance and refi_start_date and refi_start_date.year == year and roll_costs == 'Pay Upfront' else 'Refi Closing: Financed' if show_refinance and refi_start_date and refi_start_date.year == year else ''}"
-            f"{'; ' if show_refinance and refi_start_date and refi_start_date.year == year and refi_points_cost_method == 'Pay Upfront' else ''}{'Refi Points: Upfront' if show_refinance and refi_start_date and refi_start_date.year == year and refi_points_cost_method == 'Pay Upfront' else 'Refi Points: Financed' if show_refinance and refi_start_date and refi_start_date.year == year else ''}"
-        ).strip("; ")
-        indirect_costs = pmi + year_taxes + year_insurance + year_maintenance + year_hoa + year_emergency + year_closing + year_points
-        buy_cost = p_and_i + indirect_costs
-
-        year_rent = current_rent * 12
-        year_renters_insurance = current_renters_insurance
-        year_deposit = current_deposit if year == purchase_year else 0
-        year_utilities = current_utilities
-        year_pet_fee = current_pet_fee if pet_fee_frequency == "Annual" or (pet_fee_frequency == "One-time" and year == purchase_year) else 0
-        year_application_fee = application_fee if year == purchase_year else 0
-        year_renewal_fee = lease_renewal_fee if year > purchase_year else 0
-        year_parking = current_parking * 12
-        rent_cost = year_rent + year_renters_insurance + year_deposit + year_utilities + year_pet_fee + year_application_fee + year_renewal_fee + year_parking
-
-        cumulative_buy += buy_cost
-        cumulative_rent += rent_cost
-        home_value = home_value * (1 + annual_appreciation / 100)
-        appreciation = home_value - base_home_value
-        equity = home_value - year_balance if year_balance > 0 else home_value
-
-        cost_difference = buy_cost - rent_cost
-        if cost_difference > 0:
-            rent_investment = rent_investment * (1 + vti_annual_return / 100) + cost_difference
-            buy_investment = buy_investment * (1 + vti_annual_return / 100)
-        else:
-            buy_investment = buy_investment * (1 + vti_annual_return / 100) + abs(cost_difference)
-            rent_investment = rent_investment * (1 + vti_annual_return / 100)
-
-        buy_total_assets = equity + buy_investment
-        rent_total_assets = rent_investment
-
-        comparison_data.append({
-            "Year": year,
-            "Direct Costs (P&I)": p_and_i,
-            "Indirect Costs": indirect_costs,
-            "PMI": pmi,
-            "Property Taxes": year_taxes,
-            "Home Insurance": year_insurance,
-            "Maintenance": year_maintenance,
-            "Emergency": year_emergency,
-            "HOA Fees": year_hoa,
-            "Closing Costs": year_closing,
-            "Points Costs": year_points,
-            "Financing Method": financing_method if financing_method else "None",
-            "Total Buying Cost": buy_cost,
-            "Total Renting Cost": rent_cost,
-            "Cumulative Buying Cost": cumulative_buy,
-            "Cumulative Renting Cost": cumulative_rent,
-            "Cost Difference (Buy - Rent)": cumulative_buy - cumulative_rent,
-            "Equity Gain": equity,
-            "Appreciation": appreciation,
-            "Buying Investment": buy_investment,
-            "Renting Investment": rent_investment,
-            "Buying Total Assets": buy_total_assets,
-            "Renting Total Assets": rent_total_assets,
-            "Asset Difference (Buy - Rent)": buy_total_assets - rent_total_assets,
-            "Rent": year_rent,
-            "Renters Insurance": year_renters_insurance,
-            "Security Deposit": year_deposit,
-            "Utilities": year_utilities,
-            "Pet Fees": year_pet_fee,
-            "Application Fee": year_application_fee,
-            "Lease Renewal Fee": year_renewal_fee,
-            "Parking Fee": year_parking
-        })
 
-        current_rent *= (1 + annual_rent_increase / 100)
-        current_renters_insurance *= (1 + annual_rent_increase / 100)
-        current_utilities *= (1 + annual_rent_increase / 100)
-        current_pet_fee *= (1 + annual_rent_increase / 100) if pet_fee_frequency == "Annual" else 1
-        current_parking *= (1 + annual_rent_increase / 100)
-
-    return pd.DataFrame(comparison_data)
+    # Mortgage totals per calendar year, aligned to the evaluation years (zero outside the loan term)
+    by_year = annual_df.groupby("Year").agg(
+        {"Payment": "sum", "Extra Principal Payments": "sum", "PMI": "sum", "Balance": "last"}
+    ).reindex(years, fill_value=0)
+    by_year.loc[years > purchase_year + loan_years] = 0
+    p_and_i = by_year["Payment"].to_numpy(dtype=float) + by_year["Extra Principal Payments"].to_numpy(dtype=float)
+    pmi = by_year["PMI"].to_numpy(dtype=float)
+    year_balance = by_year["Balance"].to_numpy(dtype=float)
+
+    # Financing tags only apply to the purchase and refinance years
+    financing_methods = np.full(n_years, "None", dtype=object)
+    for i in np.flatnonzero(is_purchase | is_refi):
+        parts = []
+        if is_purchase[i]:
+            parts.append("Closing: Upfront" if closing_costs_method == "Pay Upfront" else "Closing: Financed")
+            parts.append("Points: Upfront" if points_cost_method == "Pay Upfront" else "Points: Financed")
+        if is_refi[i]:
+            parts.append("Refi Closing: Upfront" if roll_costs == "Pay Upfront" else "Refi Closing: Financed")
+            parts.append("Refi Points: Upfront" if refi_points_cost_method == "Pay Upfront" else "Refi Points: Financed")
+        financing_methods[i] = "; ".join(parts)
+
+    # Owner costs escalate from the purchase year
+    year_taxes = taxes * (1 + annual_property_tax_increase / 100) ** year_idx
+    year_insurance = insurance * (1 + annual_insurance_increase / 100) ** year_idx
+    year_maintenance = maintenance * (1 + annual_maintenance_increase / 100) ** year_idx
+    year_hoa = hoa * (1 + annual_hoa_increase / 100) ** year_idx
+    if edited_emergency_expenses.empty:
+        year_emergency = np.zeros(n_years)
+    else:
+        year_emergency = edited_emergency_expenses.groupby("Year")["Amount ($)"].sum().reindex(years, fill_value=0).to_numpy(dtype=float)
+    year_closing = np.where(is_purchase & (closing_costs_method == "Pay Upfront"), closing_costs, 0) + np.where(is_refi & (roll_costs == "Pay Upfront"), refi_costs or 0, 0)
+    year_points = np.where(is_purchase & (points_cost_method == "Pay Upfront"), points_cost, 0) + np.where(is_refi & (refi_points_cost_method == "Pay Upfront"), refi_points_cost or 0, 0)
+    indirect_costs = pmi + year_taxes + year_insurance + year_maintenance + year_hoa + year_emergency + year_closing + year_points
+    buy_cost = p_and_i + indirect_costs
+
+    # Renter costs escalate from the first evaluated year
+    rent_growth = (1 + annual_rent_increase / 100) ** step
+    year_rent = cost_of_rent * rent_growth * 12
+    year_renters_insurance = renters_insurance * rent_growth
+    year_deposit = np.where(is_purchase, security_deposit, 0)
+    year_utilities = rental_utilities * rent_growth
+    if pet_fee_frequency == "Annual":
+        year_pet_fee = pet_fee * rent_growth
+    else:
+        year_pet_fee = np.where(is_purchase & (pet_fee_frequency == "One-time"), pet_fee, 0)
+    year_application_fee = np.where(is_purchase, application_fee, 0)
+    year_renewal_fee = np.where(years > purchase_year, lease_renewal_fee, 0)
+    year_parking = parking_fee * rent_growth * 12
+    rent_cost = year_rent + year_renters_insurance + year_deposit + year_utilities + year_pet_fee + year_application_fee + year_renewal_fee + year_parking
+
+    cumulative_buy = np.cumsum(buy_cost)
+    cumulative_rent = np.cumsum(rent_cost)
+    home_value = purchase_price * (1 + annual_appreciation / 100) ** (step + 1)
+    appreciation = home_value - purchase_price
+    equity = np.where(year_balance > 0, home_value - year_balance, home_value)
+
+    # Whichever side costs less invests the difference; x_n = x_{n-1}*g + c_n solved as a discounted cumsum
+    cost_difference = buy_cost - rent_cost
+    growth = (1 + vti_annual_return / 100) ** (step + 1)
+    rent_investment = growth * ((down_payment + security_deposit) + np.cumsum(np.maximum(cost_difference, 0) / growth))
+    buy_investment = growth * np.cumsum(np.maximum(-cost_difference, 0) / growth)
+
+    buy_total_assets = equity + buy_investment
+    rent_total_assets = rent_investment
+
+    return pd.DataFrame({
+        "Year": years,
+        "Direct Costs (P&I)": p_and_i,
+        "Indirect Costs": indirect_costs,
+        "PMI": pmi,
+        "Property Taxes": year_taxes,
+        "Home Insurance": year_insurance,
+        "Maintenance": year_maintenance,
+        "Emergency": year_emergency,
+        "HOA Fees": year_hoa,
+        "Closing Costs": year_closing,
+        "Points Costs": year_points,
+        "Financing Method": financing_methods,
+        "Total Buying Cost": buy_cost,
+        "Total Renting Cost": rent_cost,
+        "Cumulative Buying Cost": cumulative_buy,
+        "Cumulative Renting Cost": cumulative_rent,
+        "Cost Difference (Buy - Rent)": cumulative_buy - cumulative_rent,
+        "Equity Gain": equity,
+        "Appreciation": appreciation,
+        "Buying Investment": buy_investment,
+        "Renting Investment": rent_investment,
+        "Buying Total Assets": buy_total_assets,
+        "Renting Total Assets": rent_total_assets,
+        "Asset Difference (Buy - Rent)": buy_total_assets - rent_total_assets,
+        "Buying Net Assets": buy_total_assets - cumulative_buy,
+        "Renting Net Assets": rent_total_assets - cumulative_rent,
+        "Rent": year_rent,
+        "Renters Insurance": year_renters_insurance,
+        "Security Deposit": year_deposit,
+        "Utilities": year_utilities,
+        "Pet Fees": year_pet_fee,
+        "Application Fee": year_application_fee,
+        "Lease Renewal Fee": year_renewal_fee,
+        "Parking Fee": year_parking
+    })
 
 @st.cache_data
 def calculate_breakeven(no_refi_monthly_df, monthly_with_extra_df, refi_costs, refi_points_cost, roll_costs, refi_points_cost_method):
@@ -811,9 +1129,10 @@ def calculate_breakeven(no_refi_monthly_df, monthly_with_extra_df, refi_costs, r
     refi_cum_interest = monthly_with_extra_df['Interest'].cumsum()
     refi_cum_pmi = monthly_with_extra_df['PMI'].cumsum() if 'PMI' in monthly_with_extra_df.columns else 0.0
     savings = (no_refi_cum_interest + no_refi_cum_pmi) - (refi_cum_interest + refi_cum_pmi)
-    breakeven_idx = savings[savings >= total_costs].index
-    if len(breakeven_idx) > 0:
-        breakeven_month = int(breakeven_idx[0]) + 1
+    # Savings can dip, but its running max is sorted and first reaches the costs at the same month
+    reached = np.searchsorted(np.fmax.accumulate(savings.to_numpy(dtype=float)), total_costs, side="left")
+    if reached < len(savings):
+        breakeven_month = int(savings.index[reached]) + 1
         breakeven_years = breakeven_month / 12
         return breakeven_years, breakeven_month
     return None, None
@@ -825,20 +1144,173 @@ def get_remaining_balance(schedule_df, refi_date):
     mask = schedule_df["Date"] <= refi_date
     return schedule_df.loc[mask, "Balance"].iloc[-1] if mask.any() else schedule_df["Balance"].iloc[0]
 
+
+def _schedule_by_year(annual_df, years):
+    """Per-calendar-year schedule sums and year-end Balance aligned to `years`; zero where the schedule has no data."""
+    columns = ["P&I", "PMI", "Extra Principal Payments", "Principal", "Balance"]
+    agg = {col: "last" if col == "Balance" else "sum" for col in columns if col in annual_df.columns}
+    if 'Date' not in annual_df.columns or annual_df.empty or not agg:
+        return pd.DataFrame(0.0, index=list(years), columns=columns)
+    by_year = annual_df.groupby(annual_df["Date"].dt.year).agg(agg)
+    return by_year.reindex(index=list(years), columns=columns, fill_value=0.0).astype(float)
+
+
+@st.cache_data(show_spinner=False)
+def calculate_simulation_costs(
+    annual_df,
+    years,
+    purchase_year,
+    taxes,
+    insurance,
+    maintenance,
+    hoa,
+    tax_increase,
+    insurance_increase,
+    maintenance_increase,
+    hoa_increase,
+    closing_costs,
+    points_cost,
+    refi_year,
+    refi_cost,
+    current_rent,
+    current_renters_insurance,
+    current_deposit,
+    current_utilities,
+    current_pet_fee,
+    pet_fee_annual,
+    application_fee,
+    lease_renewal_fee,
+    current_parking,
+    rent_increase
+):
+    """Per-year Buy cost, Rent cost and loan balance for the stochastic simulations; none of them depend on the draws."""
+    by_year = _schedule_by_year(annual_df, years)
+    p_and_i_by_year = by_year["P&I"].to_numpy()
+    pmi_by_year = by_year["PMI"].to_numpy()
+    balance = by_year["Balance"].to_numpy()
+
+    # Homeowner costs inflate from the purchase year, renter costs from the first simulated year
+    years_arr = np.asarray(years)
+    year_idx = years_arr - purchase_year
+    recurring_buy = (
+        float(taxes) * np.power(1 + float(tax_increase) / 100.0, year_idx)
+        + float(insurance) * np.power(1 + float(insurance_increase) / 100.0, year_idx)
+        + float(maintenance) * np.power(1 + float(maintenance_increase) / 100.0, year_idx)
+        + float(hoa) * np.power(1 + float(hoa_increase) / 100.0, year_idx)
+    )
+    rent_growth = np.power(1 + float(rent_increase) / 100.0, np.arange(len(years)))
+    recurring_rent = (float(current_rent) * 12.0 + float(current_renters_insurance) + float(current_utilities) + float(current_parking)) * rent_growth
+    pet_fee_by_year = float(current_pet_fee) * rent_growth
+
+    # One-time items land on the purchase/refinance years (buy) or the first/later years (rent)
+    is_purchase_year = years_arr == purchase_year
+    is_refi_year = years_arr == refi_year if refi_year is not None else np.zeros(len(years), dtype=bool)
+    is_first_year = np.arange(len(years)) == 0
+    one_time_buy = np.where(is_purchase_year, float(closing_costs) + float(points_cost), 0.0) + np.where(is_refi_year, float(refi_cost), 0.0)
+    one_time_rent = (
+        np.where(is_first_year, float(current_deposit) + float(application_fee), float(lease_renewal_fee))
+        + np.where(is_first_year | pet_fee_annual, pet_fee_by_year, 0.0)
+    )
+    buy_cost = p_and_i_by_year + pmi_by_year + recurring_buy + one_time_buy
+    rent_cost = recurring_rent + one_time_rent
+    return buy_cost, rent_cost, balance
+
+
+@lru_cache(maxsize=32)
+def _t_scale(df, std_pct):
+    """Factor taking standard Student t draws (var = df/(df-2)) to unit variance, then to the target std."""
+    return std_pct/100.0 * np.sqrt((df-2)/df)
+
+@lru_cache(maxsize=32)
+def _lognormal_params(mean_pct, std_pct):
+    """(mu, sigma) of the lognormal on gross 1+r matching the arithmetic mean/stdev of r."""
+    m = 1.0 + mean_pct/100.0
+    s = std_pct/100.0
+    sigma2 = np.log(1 + (s**2)/(m**2))
+    return np.log(m) - 0.5*sigma2, np.sqrt(sigma2)
+
+def sample_t_returns(n, mean_pct, std_pct, df, rng):
+    t = rng.standard_t(df, size=n)
+    t *= _t_scale(df, std_pct)
+    t += mean_pct/100.0
+    return t
+
+def sample_lognormal_returns(n, mean_pct, std_pct, rng):
+    mu, sigma = _lognormal_params(mean_pct, std_pct)
+    gross = rng.lognormal(mean=mu, sigma=sigma, size=n)
+    gross -= 1.0
+    return gross
+
+
+@st.cache_data(show_spinner=False)
+def distribution_histograms(t_mean, t_std, t_df, ln_mean, ln_std, seed, bins=60):
+    """(counts, bin edges) in annual % for 10,000 brokerage and housing draws, binned here so only the bars are sent."""
+    rng = np.random.default_rng(seed)
+    bro = sample_t_returns(10000, t_mean, t_std, t_df, rng)
+    home = sample_lognormal_returns(10000, ln_mean, ln_std, rng)
+    return np.histogram(bro * 100, bins=bins), np.histogram(home * 100, bins=bins)
+
+
+def _histogram_figure(counts, edges, title):
+    return go.Figure(
+        go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)),
+        layout=dict(title=title, xaxis_title='% return', yaxis_title='count', bargap=0)
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_monte_carlo(n_trials, seed, t_mean, t_std, t_df, ln_mean, ln_std, buy_cost, rent_cost, balance, home_value0, rent_investment0):
+    """Buy/Rent asset paths (trials x years, float32); callers pass fresh entropy as `seed` for an unseeded run."""
+    rng = np.random.default_rng(seed)
+    # All trials' returns in one draw each: rows are trials, columns are years
+    bro = sample_t_returns((n_trials, len(buy_cost)), t_mean, t_std, t_df, rng)
+    hom = sample_lognormal_returns((n_trials, len(buy_cost)), ln_mean, ln_std, rng)
+    buy, rent = _mc_paths_kernel(bro, hom, buy_cost, rent_cost, balance, home_value0, rent_investment0)
+    # Only the cached trial paths are stored as float32; the single-path chart keeps the kernel's float64 output
+    return buy.astype(np.float32), rent.astype(np.float32)
+
+
+def _percent_difference(value, base):
+    """(value - base) / base * 100, with 0 wherever base is 0."""
+    value = np.asarray(value, dtype=float)
+    base = np.asarray(base, dtype=float)
+    out = np.zeros_like(base)
+    np.divide(value - base, base, out=out, where=base != 0)
+    out *= 100
+    return out
+
+
+def _vline_overlays(markers):
+    """Dashed vertical marker lines as layout shapes/annotations, for (x, color, label) markers."""
+    shapes = [
+        dict(type="line", xref="x", yref="paper", x0=x, x1=x, y0=0, y1=1, line=dict(color=color, dash="dash"))
+        for x, color, _ in markers
+    ]
+    annotations = [
+        dict(x=x, xref="x", y=1, yref="paper", text=label, showarrow=False, xanchor="left", yanchor="top")
+        for x, _, label in markers
+    ]
+    return shapes, annotations
+
 # Calculations
 effective_principal = loan_amount + (points_cost if points_cost_method == "Add to Loan Balance" else 0)
 effective_mortgage_rate = effective_rate
 
 extra_schedule = expand_extra_payments(extra_payments, purchase_year, loan_years, payment_frequency)
 extra_schedule_monthly = expand_extra_payments(extra_payments, purchase_year, loan_years, "Monthly")
+extras_key = _extras_key(extra_schedule)
+extras_key_monthly = _extras_key(extra_schedule_monthly)
+has_extra = any(amount > 0 for amount in extra_schedule_monthly.values())
+rates_key = _rates_key(rate_schedule)
+refi_rates_key = _rates_key(refi_rate_schedule)
 
-no_refi_schedule_df, no_refi_monthly_df, no_refi_annual_df = amortization_schedule(
+no_refi_schedule_df, no_refi_monthly_df, no_refi_annual_df = amortization_schedule_cached(
     principal=effective_principal,
     years=loan_years,
     periods_per_year=12,
     start_date=f"{purchase_year}-01-01",
-    extra_schedule=extra_schedule_monthly,
-    rate_schedule=rate_schedule,
+    extras_key=extras_key_monthly,
+    rates_key=rates_key,
     mortgage_type=mortgage_type,
     purchase_year=purchase_year,
     mortgage_rate=effective_mortgage_rate,
@@ -852,49 +1324,58 @@ if show_refinance:
     refi_effective_principal = get_remaining_balance(no_refi_schedule_df, refi_start_date) + (refi_costs if roll_costs == "Add to Loan Balance" else 0) + (refi_points_cost if refi_points_cost_method == "Add to Loan Balance" else 0)
 
 main_periods_per_year = 12 if payment_frequency == "Monthly" else 26
-schedule_with_extra_df, monthly_with_extra_df, annual_with_extra_df = amortization_schedule(
-    principal=effective_principal,
-    years=loan_years,
-    periods_per_year=main_periods_per_year,
-    start_date=f"{purchase_year}-01-01",
-    extra_schedule=extra_schedule,
-    rate_schedule=rate_schedule,
-    mortgage_type=mortgage_type,
-    purchase_year=purchase_year,
-    mortgage_rate=effective_mortgage_rate,
-    pmi_rate=pmi_rate,
-    pmi_equity_threshold=pmi_equity_threshold,
-    purchase_price=purchase_price,
-    refi_start_date=refi_start_date if show_refinance else None,
-    refi_principal=refi_effective_principal,
-    refi_years=refi_term_years,
-    refi_periods_per_year=refi_periods_per_year if show_refinance else None,
-    refi_rate_schedule=refi_rate_schedule,
-    refi_mortgage_type=refi_mortgage_type,
-    refi_mortgage_rate=refi_effective_rate
-)
+# Monthly payments without a refinance are exactly the no-refi schedule built above
+if main_periods_per_year == 12 and not show_refinance:
+    schedule_with_extra_df, monthly_with_extra_df, annual_with_extra_df = no_refi_schedule_df, no_refi_monthly_df, no_refi_annual_df
+else:
+    schedule_with_extra_df, monthly_with_extra_df, annual_with_extra_df = amortization_schedule_cached(
+        principal=effective_principal,
+        years=loan_years,
+        periods_per_year=main_periods_per_year,
+        start_date=f"{purchase_year}-01-01",
+        extras_key=extras_key,
+        rates_key=rates_key,
+        mortgage_type=mortgage_type,
+        purchase_year=purchase_year,
+        mortgage_rate=effective_mortgage_rate,
+        pmi_rate=pmi_rate,
+        pmi_equity_threshold=pmi_equity_threshold,
+        purchase_price=purchase_price,
+        refi_start_date=refi_start_date if show_refinance else None,
+        refi_principal=refi_effective_principal,
+        refi_years=refi_term_years,
+        refi_periods_per_year=refi_periods_per_year if show_refinance else None,
+        refi_rates_key=refi_rates_key,
+        refi_mortgage_type=refi_mortgage_type,
+        refi_mortgage_rate=refi_effective_rate,
+        share_pre_refi=True
+    )
 
-schedule_without_extra_df, monthly_without_extra_df, annual_without_extra_df = amortization_schedule(
-    principal=effective_principal,
-    years=loan_years,
-    periods_per_year=main_periods_per_year,
-    start_date=f"{purchase_year}-01-01",
-    extra_schedule={},
-    rate_schedule=rate_schedule,
-    mortgage_type=mortgage_type,
-    purchase_year=purchase_year,
-    mortgage_rate=effective_mortgage_rate,
-    pmi_rate=pmi_rate,
-    pmi_equity_threshold=pmi_equity_threshold,
-    purchase_price=purchase_price,
-    refi_start_date=refi_start_date if show_refinance else None,
-    refi_principal=refi_effective_principal,
-    refi_years=refi_term_years,
-    refi_periods_per_year=refi_periods_per_year if show_refinance else None,
-    refi_rate_schedule=refi_rate_schedule,
-    refi_mortgage_type=refi_mortgage_type,
-    refi_mortgage_rate=refi_effective_rate
-)
+# With no extra payments the baseline is the main schedule itself
+if not has_extra:
+    schedule_without_extra_df, monthly_without_extra_df, annual_without_extra_df = schedule_with_extra_df, monthly_with_extra_df, annual_with_extra_df
+else:
+    schedule_without_extra_df, monthly_without_extra_df, annual_without_extra_df = amortization_schedule_cached(
+        principal=effective_principal,
+        years=loan_years,
+        periods_per_year=main_periods_per_year,
+        start_date=f"{purchase_year}-01-01",
+        extras_key=(),
+        rates_key=rates_key,
+        mortgage_type=mortgage_type,
+        purchase_year=purchase_year,
+        mortgage_rate=effective_mortgage_rate,
+        pmi_rate=pmi_rate,
+        pmi_equity_threshold=pmi_equity_threshold,
+        purchase_price=purchase_price,
+        refi_start_date=refi_start_date if show_refinance else None,
+        refi_principal=refi_effective_principal,
+        refi_years=refi_term_years,
+        refi_periods_per_year=refi_periods_per_year if show_refinance else None,
+        refi_rates_key=refi_rates_key,
+        refi_mortgage_type=refi_mortgage_type,
+        refi_mortgage_rate=refi_effective_rate
+    )
 
 monthly_payment = schedule_with_extra_df['Payment'].iloc[0] if main_periods_per_year == 12 else schedule_with_extra_df['Payment'].iloc[0] * 26 / 12
 payment_per_period = schedule_with_extra_df['Payment'].iloc[0]
@@ -919,27 +1400,32 @@ if show_refinance and refi_start_date:
 interest_saved_biweekly = 0
 payoff_difference_biweekly = 0
 if payment_frequency == "Biweekly":
-    monthly_comparison_df, monthly_comparison_monthly_df, monthly_comparison_annual_df = amortization_schedule(
-        principal=effective_principal,
-        years=loan_years,
-        periods_per_year=12,
-        start_date=f"{purchase_year}-01-01",
-        extra_schedule=extra_schedule_monthly,
-        rate_schedule=rate_schedule,
-        mortgage_type=mortgage_type,
-        purchase_year=purchase_year,
-        mortgage_rate=effective_mortgage_rate,
-        pmi_rate=pmi_rate,
-        pmi_equity_threshold=pmi_equity_threshold,
-        purchase_price=purchase_price,
-        refi_start_date=refi_start_date if show_refinance else None,
-        refi_principal=refi_effective_principal,
-        refi_years=refi_term_years,
-        refi_periods_per_year=refi_periods_per_year if show_refinance else None,
-        refi_rate_schedule=refi_rate_schedule,
-        refi_mortgage_type=refi_mortgage_type,
-        refi_mortgage_rate=refi_effective_rate
-    )
+    # Without a refinance the monthly comparison is the no-refi schedule built above
+    if not show_refinance:
+        monthly_comparison_df, monthly_comparison_monthly_df, monthly_comparison_annual_df = no_refi_schedule_df, no_refi_monthly_df, no_refi_annual_df
+    else:
+        monthly_comparison_df, monthly_comparison_monthly_df, monthly_comparison_annual_df = amortization_schedule_cached(
+            principal=effective_principal,
+            years=loan_years,
+            periods_per_year=12,
+            start_date=f"{purchase_year}-01-01",
+            extras_key=extras_key_monthly,
+            rates_key=rates_key,
+            mortgage_type=mortgage_type,
+            purchase_year=purchase_year,
+            mortgage_rate=effective_mortgage_rate,
+            pmi_rate=pmi_rate,
+            pmi_equity_threshold=pmi_equity_threshold,
+            purchase_price=purchase_price,
+            refi_start_date=refi_start_date,
+            refi_principal=refi_effective_principal,
+            refi_years=refi_term_years,
+            refi_periods_per_year=refi_periods_per_year,
+            refi_rates_key=refi_rates_key,
+            refi_mortgage_type=refi_mortgage_type,
+            refi_mortgage_rate=refi_effective_rate,
+            share_pre_refi=True
+        )
     interest_saved_biweekly = monthly_comparison_df['Interest'].sum() - total_interest
     payoff_difference_biweekly = len(monthly_comparison_df) / 12 - payoff_years
 
@@ -985,6 +1471,9 @@ cost_comparison_df['Asset % Difference (Buy vs Rent)'] = np.where(
     (cost_comparison_df['Buying Total Assets'] - cost_comparison_df['Renting Total Assets']) / cost_comparison_df['Renting Total Assets'] * 100,
     0
 )
+# Keyed by year so the per-year metric sections below are single lookups
+cost_comparison_df = cost_comparison_df.set_index('Year', drop=False)
+balance_by_year = annual_with_extra_df.groupby('Year')['Balance'].last()
 
 # Display
 thick_divider()
@@ -1027,6 +1516,7 @@ with tab1:
             "Balance": "${:,.2f}",
             "Effective Rate (%)": "{:.2f}%"
         }).apply(lambda row: ["background-color: #e6f3ff" if row["Loan Type"] == "Refinance" else ""] * len(row), axis=1),
+        column_order=_SCHEDULE_COLUMNS,
         hide_index=True
     )
 with tab2:
@@ -1046,115 +1536,118 @@ with tab2:
 
 st.header("Amortization Breakdown")
 show_baseline = st.checkbox("Show baseline without extra principal (dashed)", value=True)
-schedule_with_extra_df['Year'] = schedule_with_extra_df['Date'].dt.year
 annual_with_extra = annual_with_extra_df.copy()
-annual_with_extra['Year'] = annual_with_extra['Date'].dt.year
-annual_with_extra['Cum Principal'] = annual_with_extra['Principal'].cumsum()
-annual_with_extra['Cum Interest'] = annual_with_extra['Interest'].cumsum()
-annual_with_extra['Cum PMI'] = annual_with_extra['PMI'].cumsum() if 'PMI' in annual_with_extra.columns else 0.0
+# Baseline (without extra payments) for the charts and savings comparison; read-only, so no copy
+baseline_annual = annual_without_extra_df
+# Long format (one row per year/scenario/series) so the annual tabs draw their lines with a single px.line
+amort_scenarios = [annual_with_extra_df.assign(Scenario='With Extra')]
+if show_baseline:
+    amort_scenarios.append(baseline_annual.assign(Scenario='No Extra'))
+amort_long = pd.concat(amort_scenarios, ignore_index=True)
+amort_line_styles = dict(
+    color='Series', line_dash='Scenario',
+    color_discrete_map={'Principal': 'rgba(33, 150, 243, 1)', 'Cum Principal': 'rgba(33, 150, 243, 1)'},
+    line_dash_map={'With Extra': 'solid', 'No Extra': 'dash'}
+)
+
+# Refinance year (None without one) and the refinance/purchase/payoff markers built from it,
+# computed once and shared by every yearly chart and simulation below
+refi_year = refi_start_date.year if show_refinance and refi_start_date else None
+refi_marker = [(refi_year, "orange", "Refinance")] if refi_year is not None else []
+purchase_marker = [(purchase_year, "blue", "Purchase")] if purchase_year and eval_start_year <= purchase_year <= eval_end_year else []
+payoff_marker = [(payoff_year, "purple", "Payoff")] if payoff_year and eval_start_year <= payoff_year <= eval_end_year else []
+mortgage_shapes, mortgage_annotations = _vline_overlays(refi_marker + payoff_marker)
+timeline_shapes, timeline_annotations = _vline_overlays(refi_marker + purchase_marker + payoff_marker)
 
 tab1, tab2, tab3 = st.tabs(["By Payment", "By Year", "Cumulative Payoff"])
 with tab1:
-    fig_amort_payment = go.Figure()
-    fig_amort_payment.add_trace(go.Scatter(x=schedule_with_extra_df['Date'], y=schedule_with_extra_df['Principal'], mode='lines', name='Principal (With Extra)', line=dict(dash='solid', color='rgba(33, 150, 243, 1)')))
-    fig_amort_payment.add_trace(go.Scatter(x=schedule_with_extra_df['Date'], y=schedule_with_extra_df['Interest'], mode='lines', name='Interest (With Extra)', line=dict(dash='solid')))
-    fig_amort_payment.add_trace(go.Bar(x=schedule_with_extra_df['Date'], y=schedule_with_extra_df['PMI'], name='PMI', yaxis='y2', opacity=0.4))
+    # float32 is ample precision for plotting per-payment amounts and halves the trace payload sent to the browser
+    with_extra_plot = schedule_with_extra_df.astype(_PER_PAYMENT_PLOT_DTYPES)
+    # Collect the traces first so the figure validates its data list once
+    amort_payment_traces = [
+        go.Scattergl(x=with_extra_plot['Date'], y=with_extra_plot['Principal'], mode='lines', name='Principal (With Extra)', line=dict(dash='solid', color='rgba(33, 150, 243, 1)')),
+        go.Scattergl(x=with_extra_plot['Date'], y=with_extra_plot['Interest'], mode='lines', name='Interest (With Extra)', line=dict(dash='solid')),
+        go.Bar(x=with_extra_plot['Date'], y=with_extra_plot['PMI'], name='PMI', yaxis='y2', opacity=0.4),
+    ]
     if show_baseline:
-        fig_amort_payment.add_trace(go.Scatter(x=schedule_without_extra_df['Date'], y=schedule_without_extra_df['Principal'], mode='lines', name='Principal (No Extra)', line=dict(dash='dash')))
-        fig_amort_payment.add_trace(go.Scatter(x=schedule_without_extra_df['Date'], y=schedule_without_extra_df['Interest'], mode='lines', name='Interest (No Extra)', line=dict(dash='dash')))
+        without_extra_plot = schedule_without_extra_df.astype(_PER_PAYMENT_PLOT_DTYPES)
+        amort_payment_traces += [
+            go.Scattergl(x=without_extra_plot['Date'], y=without_extra_plot['Principal'], mode='lines', name='Principal (No Extra)', line=dict(dash='dash')),
+            go.Scattergl(x=without_extra_plot['Date'], y=without_extra_plot['Interest'], mode='lines', name='Interest (No Extra)', line=dict(dash='dash')),
+        ]
+    fig_amort_payment = go.Figure(data=amort_payment_traces)
+    # The date axis takes marker positions in epoch milliseconds rather than years
+    payment_shapes, payment_annotations = _vline_overlays(
+        [(pd.Timestamp(refi_start_date).timestamp() * 1000, color, label) for _, color, label in refi_marker]
+        + [(pd.Timestamp(f"{year}-01-01").timestamp() * 1000, color, label) for year, color, label in payoff_marker]
+    )
     fig_amort_payment.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Date', yaxis_title='Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+        **_CHART_LAYOUT,
+        shapes=payment_shapes, annotations=payment_annotations,
+        xaxis_title='Date', yaxis_title='Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)')
     )
-    if show_refinance and refi_start_date:
-        refi_timestamp = pd.Timestamp(refi_start_date).timestamp() * 1000
-        fig_amort_payment.add_vline(x=refi_timestamp, line_dash="dash", line_color="orange", annotation_text="Refinance")
-    if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-        payoff_timestamp = pd.Timestamp(f"{payoff_year}-01-01").timestamp() * 1000
-        fig_amort_payment.add_vline(x=payoff_timestamp, line_dash="dash", line_color="purple", annotation_text="Payoff")
     st.plotly_chart(fig_amort_payment, use_container_width=True)
 
 with tab2:
-    fig_amort_year = go.Figure()
-    fig_amort_year.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Principal'], mode='lines', name='Principal (With Extra)', line=dict(dash='solid', color='rgba(33, 150, 243, 1)')))
-    fig_amort_year.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Interest'], mode='lines', name='Interest (With Extra)', line=dict(dash='solid')))
+    fig_amort_year = px.line(
+        amort_long.melt(id_vars=['Year', 'Scenario'], value_vars=['Principal', 'Interest'], var_name='Series', value_name='Amount'),
+        x='Year', y='Amount', render_mode='webgl', **amort_line_styles
+    )
     fig_amort_year.add_trace(go.Bar(x=annual_with_extra['Year'], y=annual_with_extra['PMI'], name='PMI', yaxis='y2', opacity=0.4))
-    if show_baseline:
-        annual_without_extra_local = annual_without_extra_df.copy()
-        annual_without_extra_local['Year'] = annual_without_extra_local['Date'].dt.year
-        fig_amort_year.add_trace(go.Scatter(x=annual_without_extra_local['Year'], y=annual_without_extra_local['Principal'], mode='lines', name='Principal (No Extra)', line=dict(dash='dash')))
-        fig_amort_year.add_trace(go.Scatter(x=annual_without_extra_local['Year'], y=annual_without_extra_local['Interest'], mode='lines', name='Interest (No Extra)', line=dict(dash='dash')))
     fig_amort_year.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+        **_CHART_LAYOUT,
+        shapes=mortgage_shapes, annotations=mortgage_annotations,
+        xaxis_title='Year', yaxis_title='Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)')
     )
-    if show_refinance and refi_start_date:
-        fig_amort_year.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-    if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-        fig_amort_year.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
     st.plotly_chart(fig_amort_year, use_container_width=True)
 
 with tab3:
-    fig_amort_cum = go.Figure()
-    fig_amort_cum.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Cum Principal'], mode='lines', name='Principal (With Extra)', line=dict(dash='solid', color='rgba(33, 150, 243, 1)')))
-    fig_amort_cum.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Cum Interest'], mode='lines', name='Interest (With Extra)', line=dict(dash='solid')))
+    fig_amort_cum = px.line(
+        amort_long.melt(id_vars=['Year', 'Scenario'], value_vars=['Cum Principal', 'Cum Interest'], var_name='Series', value_name='Amount'),
+        x='Year', y='Amount', render_mode='webgl', **amort_line_styles
+    )
     fig_amort_cum.add_trace(go.Bar(x=annual_with_extra['Year'], y=annual_with_extra['Cum PMI'], name='PMI', yaxis='y2', opacity=0.4))
-    if show_baseline:
-        annual_without_extra_local = annual_without_extra_df.copy()
-        annual_without_extra_local['Year'] = annual_without_extra_local['Date'].dt.year
-        annual_without_extra_local['Cum Principal'] = annual_without_extra_local['Principal'].cumsum()
-        annual_without_extra_local['Cum Interest'] = annual_without_extra_local['Interest'].cumsum()
-        fig_amort_cum.add_trace(go.Scatter(x=annual_without_extra_local['Year'], y=annual_without_extra_local['Cum Principal'], mode='lines', name='Cum Principal (No Extra)', line=dict(dash='dash')))
-        fig_amort_cum.add_trace(go.Scatter(x=annual_without_extra_local['Year'], y=annual_without_extra_local['Cum Interest'], mode='lines', name='Cum Interest (No Extra)', line=dict(dash='dash')))
     fig_amort_cum.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Cumulative Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+        **_CHART_LAYOUT,
+        shapes=mortgage_shapes, annotations=mortgage_annotations,
+        xaxis_title='Year', yaxis_title='Cumulative Amount ($)', yaxis2=dict(overlaying='y', side='right', title='PMI ($)')
     )
-    if show_refinance and refi_start_date:
-        fig_amort_cum.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-    if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-        fig_amort_cum.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
     st.plotly_chart(fig_amort_cum, use_container_width=True)
 
 st.divider()  # divider between Mortgage Metrics and Savings Comparison
-# Prepare baseline (without extra payments) for savings comparison
-annual_without_extra = annual_without_extra_df.copy()
-annual_without_extra['Year'] = annual_without_extra['Date'].dt.year
-annual_without_extra['Cum Principal'] = annual_without_extra['Principal'].cumsum()
-annual_without_extra['Cum Interest'] = annual_without_extra['Interest'].cumsum()
-annual_without_extra['Cum PMI'] = annual_without_extra['PMI'].cumsum() if 'PMI' in annual_without_extra.columns else 0.0
 
 st.header("Savings from Extra Payments")
-annual_with_extra['Interest Saved (Cum)'] = (annual_without_extra['Cum Interest'] - annual_with_extra['Cum Interest']).fillna(0)
-annual_with_extra['PMI Saved (Cum)'] = (annual_without_extra['Cum PMI'] - annual_with_extra['Cum PMI']).fillna(0)
-annual_with_extra['Interest Saved (Year)'] = annual_with_extra['Interest Saved (Cum)'].diff().fillna(annual_with_extra['Interest Saved (Cum)'])
-annual_with_extra['PMI Saved (Year)'] = annual_with_extra['PMI Saved (Cum)'].diff().fillna(annual_with_extra['PMI Saved (Cum)'])
-
-tab_y, tab_c = st.tabs(["By Year", "Cumulative"])
-with tab_y:
-    fig_sy = go.Figure()
-    fig_sy.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved (Year)'], mode='lines+markers', name='Interest Saved (Year)'))
-    fig_sy.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved (Year)'], mode='lines+markers', name='PMI Saved (Year)', yaxis='y2'))
-    fig_sy.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
-    )
-    st.plotly_chart(fig_sy, use_container_width=True)
-
-with tab_c:
-    fig_sc = go.Figure()
-    fig_sc.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved (Cum)'], mode='lines+markers', name='Interest Saved (Cum)'))
-    fig_sc.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved (Cum)'], mode='lines+markers', name='PMI Saved (Cum)', yaxis='y2'))
-    fig_sc.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
-    )
-    st.plotly_chart(fig_sc, use_container_width=True)
+if has_extra:
+    annual_with_extra['Interest Saved (Cum)'] = (baseline_annual['Cum Interest'] - annual_with_extra['Cum Interest']).fillna(0)
+    annual_with_extra['PMI Saved (Cum)'] = (baseline_annual['Cum PMI'] - annual_with_extra['Cum PMI']).fillna(0)
+    # Yearly savings are the first differences of the cumulative savings, starting from zero
+    annual_with_extra['Interest Saved (Year)'] = np.diff(annual_with_extra['Interest Saved (Cum)'].to_numpy(), prepend=0.0)
+    annual_with_extra['PMI Saved (Year)'] = np.diff(annual_with_extra['PMI Saved (Cum)'].to_numpy(), prepend=0.0)
+
+    tab_y, tab_c = st.tabs(["By Year", "Cumulative"])
+    with tab_y:
+        fig_sy = go.Figure(data=[
+            go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved (Year)'], mode='lines+markers', name='Interest Saved (Year)'),
+            go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved (Year)'], mode='lines+markers', name='PMI Saved (Year)', yaxis='y2'),
+        ])
+        fig_sy.update_layout(
+            **_CHART_LAYOUT,
+            xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)')
+        )
+        st.plotly_chart(fig_sy, use_container_width=True)
+
+    with tab_c:
+        fig_sc = go.Figure(data=[
+            go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved (Cum)'], mode='lines+markers', name='Interest Saved (Cum)'),
+            go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved (Cum)'], mode='lines+markers', name='PMI Saved (Cum)', yaxis='y2'),
+        ])
+        fig_sc.update_layout(
+            **_CHART_LAYOUT,
+            xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)')
+        )
+        st.plotly_chart(fig_sc, use_container_width=True)
+else:
+    st.caption("No extra principal payments entered, so there are no savings to show.")
 
 
 # Savings from Buying Points
@@ -1162,18 +1655,18 @@ if buy_points and points > 0:
     st.header("Savings from Buying Points")
     # Compare payment/interest with and without the points discount, holding term constant.
     # Build a no-points schedule for comparison.
-    no_points_rate_schedule = rate_schedule.copy()
+    # Fixed loans build their single-rate table from mortgage_rate, so only variable ones need shifted rates
     if mortgage_type == "Fixed":
-        no_points_rate_schedule["Rate (%)"] = mortgage_rate
+        no_points_rates_key = None
     else:
-        no_points_rate_schedule["Rate (%)"] = no_points_rate_schedule["Rate (%)"] + (discount_per_point * points)
-    no_points_df, no_points_monthly, no_points_annual = amortization_schedule(
+        no_points_rates_key = tuple((year, rate + (discount_per_point * points)) for year, rate in rates_key)
+    no_points_df, no_points_monthly, no_points_annual = amortization_schedule_cached(
         principal=loan_amount + (closing_costs if closing_costs_method == "Add to Loan Balance" else 0) + (0 if points_cost_method == "Pay Upfront" else points_cost),
         years=loan_years,
         periods_per_year=12,
         start_date=f"{purchase_year}-01-01",
-        extra_schedule=extra_schedule_monthly,
-        rate_schedule=no_points_rate_schedule,
+        extras_key=extras_key_monthly,
+        rates_key=no_points_rates_key,
         mortgage_type=mortgage_type,
         purchase_year=purchase_year,
         mortgage_rate=mortgage_rate,
@@ -1182,46 +1675,35 @@ if buy_points and points > 0:
         purchase_price=purchase_price
     )
     pts_annual = annual_with_extra_df.copy()
-    pts_annual['Year'] = pts_annual['Date'].dt.year
     no_pts_annual = no_points_annual.copy()
-    no_pts_annual['Year'] = no_pts_annual['Date'].dt.year
-    pts_annual['Cum Interest'] = pts_annual['Interest'].cumsum()
-    no_pts_annual['Cum Interest'] = no_pts_annual['Interest'].cumsum()
     interest_saved_points = no_pts_annual['Cum Interest'] - pts_annual['Cum Interest']
-    cum_points_cost = np.cumsum([points_cost if points_cost_method == "Pay Upfront" and y == purchase_year else 0 for y in pts_annual['Year']])
-    fig_pts = go.Figure()
-    fig_pts.add_trace(go.Scatter(x=pts_annual['Year'], y=interest_saved_points, mode='lines+markers', name='Interest Saved from Points'))
-    fig_pts.add_trace(go.Scatter(x=pts_annual['Year'], y=cum_points_cost, mode='lines+markers', name='Cumulative Points Cost', yaxis='y2'))
+    upfront_points = (pts_annual['Year'].to_numpy() == purchase_year) & (points_cost_method == "Pay Upfront")
+    cum_points_cost = np.cumsum(np.where(upfront_points, points_cost, 0.0))
+    fig_pts = go.Figure(data=[
+        go.Scattergl(x=pts_annual['Year'], y=interest_saved_points, mode='lines+markers', name='Interest Saved from Points'),
+        go.Scattergl(x=pts_annual['Year'], y=cum_points_cost, mode='lines+markers', name='Cumulative Points Cost', yaxis='y2'),
+    ])
     fig_pts.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='Cumulative Cost ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+        **_CHART_LAYOUT,
+        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='Cumulative Cost ($)')
     )
     fig_pts.add_hline(y=0, line_dash="dash", line_color="black")
     st.plotly_chart(fig_pts, use_container_width=True)
 
-if payment_frequency == "Biweekly":
+if payment_frequency == "Biweekly" and not monthly_comparison_annual_df.empty:
     st.header("Savings from Biweekly Payments")
     monthly_comp_annual = monthly_comparison_annual_df.copy()
-    monthly_comp_annual['Year'] = monthly_comp_annual['Date'].dt.year
-    monthly_comp_annual['Cum Interest'] = monthly_comp_annual['Interest'].cumsum()
-    monthly_comp_annual['Cum PMI'] = monthly_comp_annual['PMI'].cumsum()
-    annual_with_extra['Cum Interest'] = annual_with_extra['Interest'].cumsum()
-    annual_with_extra['Cum PMI'] = annual_with_extra['PMI'].cumsum()
     annual_with_extra['Interest Saved'] = monthly_comp_annual['Cum Interest'] - annual_with_extra['Cum Interest']
     annual_with_extra['PMI Saved'] = monthly_comp_annual['Cum PMI'] - annual_with_extra['Cum PMI']
-    fig_saved_bi = go.Figure()
-    fig_saved_bi.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved'], mode='lines+markers', name='Interest Saved'))
-    fig_saved_bi.add_trace(go.Scatter(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved'], mode='lines+markers', name='PMI Saved', yaxis='y2'))
+    fig_saved_bi = go.Figure(data=[
+        go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['Interest Saved'], mode='lines+markers', name='Interest Saved'),
+        go.Scattergl(x=annual_with_extra['Year'], y=annual_with_extra['PMI Saved'], mode='lines+markers', name='PMI Saved', yaxis='y2'),
+    ])
     fig_saved_bi.update_layout(
-        plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)'),
-        legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+        **_CHART_LAYOUT,
+        shapes=mortgage_shapes, annotations=mortgage_annotations,
+        xaxis_title='Year', yaxis_title='Interest Saved ($)', yaxis2=dict(overlaying='y', side='right', title='PMI Saved ($)')
     )
-    if show_refinance and refi_start_date:
-        fig_saved_bi.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-    if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-        fig_saved_bi.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
     fig_saved_bi.add_hline(y=0, line_dash='dash', line_color='black')
     st.plotly_chart(fig_saved_bi, use_container_width=True)
 
@@ -1242,16 +1724,16 @@ thick_divider()
 
 st.header("2. Asset Metrics")
 st.markdown('<div class="highlight-box">Buying assets include home equity, appreciation, and Personal Brokerage Account investments. Renting assets include Personal Brokerage Account investments from cost savings and down payment.</div>', unsafe_allow_html=True)
-final_data = cost_comparison_df[cost_comparison_df["Year"] == selected_year]
-if not final_data.empty:
-    final_balance = annual_with_extra_df[annual_with_extra_df["Date"].dt.year == selected_year]["Balance"].iloc[-1] if selected_year in annual_with_extra_df["Date"].dt.year.values else 0
+if selected_year in cost_comparison_df.index:
+    final_data = cost_comparison_df.loc[selected_year]
+    final_balance = balance_by_year.get(selected_year, 0)
     final_home_value = purchase_price * (1 + annual_appreciation / 100) ** (selected_year - purchase_year)
-    equity_gain = final_data["Equity Gain"].iloc[0]
-    appreciation = final_data["Appreciation"].iloc[0]
-    buying_investment = final_data["Buying Investment"].iloc[0]
-    renting_investment = final_data["Renting Investment"].iloc[0]
-    buying_assets = final_data["Buying Total Assets"].iloc[0]
-    renting_assets = final_data["Renting Total Assets"].iloc[0]
+    equity_gain = final_data["Equity Gain"]
+    appreciation = final_data["Appreciation"]
+    buying_investment = final_data["Buying Investment"]
+    renting_investment = final_data["Renting Investment"]
+    buying_assets = final_data["Buying Total Assets"]
+    renting_assets = final_data["Renting Total Assets"]
     asset_difference = buying_assets - renting_assets
 else:
     year_idx = selected_year - purchase_year
@@ -1259,12 +1741,12 @@ else:
     final_home_value = purchase_price * (1 + annual_appreciation / 100) ** year_idx
     equity_gain = final_home_value
     appreciation = final_home_value - purchase_price
-    last_year_data = cost_comparison_df[cost_comparison_df["Year"] == cost_comparison_df["Year"].max()]
-    if not last_year_data.empty:
-        last_year_idx = cost_comparison_df["Year"].max() - purchase_year
+    if not cost_comparison_df.empty:
+        last_year_data = cost_comparison_df.loc[cost_comparison_df.index.max()]
+        last_year_idx = cost_comparison_df.index.max() - purchase_year
         years_diff = year_idx - last_year_idx
-        buying_investment = last_year_data["Buying Investment"].iloc[0] * (1 + vti_annual_return / 100) ** years_diff
-        renting_investment = last_year_data["Renting Investment"].iloc[0] * (1 + vti_annual_return / 100) ** years_diff
+        buying_investment = last_year_data["Buying Investment"] * (1 + vti_annual_return / 100) ** years_diff
+        renting_investment = last_year_data["Renting Investment"] * (1 + vti_annual_return / 100) ** years_diff
     else:
         buying_investment = 0
         renting_investment = 0
@@ -1272,6 +1754,12 @@ else:
     renting_assets = renting_investment
     asset_difference = buying_assets - renting_assets
 
+# Number formats for the Item / Value / % of Total breakdown tables (the Total row is always last)
+breakdown_columns = {
+    "Value": st.column_config.NumberColumn("Value", format="dollar"),
+    "% of Total": st.column_config.NumberColumn("% of Total", format="%.2f%%"),
+}
+
 buy_col, rent_col = st.columns(2)
 with buy_col:
     st.markdown(f"### Buying Assets ({selected_year})")
@@ -1279,40 +1767,29 @@ with buy_col:
         "Item": ["Equity Gain", "Appreciation", "Investment"],
         "Value": [equity_gain, appreciation, buying_investment]
     })
-    buy_asset_df = buy_asset_df[buy_asset_df["Value"] > 0]
+    buy_asset_df = buy_asset_df[buy_asset_df["Value"] > 0].reset_index(drop=True)
     total_buy = buy_asset_df["Value"].sum()
     buy_asset_df["% of Total"] = (buy_asset_df["Value"] / total_buy) * 100 if total_buy > 0 else 0
-    total_buy_row = pd.DataFrame({"Item": ["Total"], "Value": [total_buy], "% of Total": [100.0]})
-    buy_asset_df = pd.concat([buy_asset_df, total_buy_row], ignore_index=True)
-    st.dataframe(
-        buy_asset_df.style.format({"Value": "${:,.2f}", "% of Total": "{:.2f}%"})
-        .apply(lambda row: ["background-color: #e6f3ff" if row["Item"] == "Total" else ""] * len(row), axis=1),
-        hide_index=True
-    )
+    buy_asset_df.loc[len(buy_asset_df)] = ['Total', total_buy, 100.0]
+    st.dataframe(buy_asset_df, column_config=breakdown_columns, hide_index=True)
 with rent_col:
     st.markdown(f"### Renting Assets ({selected_year})")
     rent_asset_df = pd.DataFrame({
         "Item": ["Investment"],
         "Value": [renting_investment]
     })
-    rent_asset_df = rent_asset_df[rent_asset_df["Value"] > 0]
+    rent_asset_df = rent_asset_df[rent_asset_df["Value"] > 0].reset_index(drop=True)
     total_rent = rent_asset_df["Value"].sum()
     rent_asset_df["% of Total"] = (rent_asset_df["Value"] / total_rent) * 100 if total_rent > 0 else 0
-    total_rent_row = pd.DataFrame({"Item": ["Total"], "Value": [total_rent], "% of Total": [100.0]})
-    rent_asset_df = pd.concat([rent_asset_df, total_rent_row], ignore_index=True)
-    st.dataframe(
-        rent_asset_df.style.format({"Value": "${:,.2f}", "% of Total": "{:.2f}%"})
-        .apply(lambda row: ["background-color: #e6f3ff" if row["Item"] == "Total" else ""] * len(row), axis=1),
-        hide_index=True
-    )
+    rent_asset_df.loc[len(rent_asset_df)] = ['Total', total_rent, 100.0]
+    st.dataframe(rent_asset_df, column_config=breakdown_columns, hide_index=True)
 
-buy_asset_data = cost_comparison_df[cost_comparison_df['Year'] == selected_year][['Equity Gain', 'Appreciation', 'Buying Investment']].melt(
-    var_name='Category', value_name='Value'
-)
+# One row holds the whole selected-year breakdown, so the Category/Item frames are built straight from it
+selected_row = cost_comparison_df.loc[selected_year]
+buy_asset_cols = ['Equity Gain', 'Appreciation', 'Buying Investment']
+buy_asset_data = pd.DataFrame({'Category': buy_asset_cols, 'Value': selected_row[buy_asset_cols].to_numpy(dtype=float)})
 buy_asset_data = buy_asset_data[buy_asset_data['Value'] > 0]
-rent_asset_data = cost_comparison_df[cost_comparison_df['Year'] == selected_year][['Renting Investment']].melt(
-    var_name='Category', value_name='Value'
-)
+rent_asset_data = pd.DataFrame({'Category': ['Renting Investment'], 'Value': [float(selected_row['Renting Investment'])]})
 rent_asset_data = rent_asset_data[rent_asset_data['Value'] > 0]
 
 st.divider()
@@ -1328,18 +1805,12 @@ with st.container(border=True):
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Assets": cost_comparison_df["Buying Total Assets"], "Type": "Buying"}),
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Assets": cost_comparison_df["Renting Total Assets"], "Type": "Renting"})
         ], ignore_index=True)
-        fig_assets = px.line(asset_data, x='Year', y='Assets', color='Type', markers=True)
+        fig_assets = px.line(asset_data, x='Year', y='Assets', color='Type', markers=True, render_mode='webgl')
         fig_assets.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Annual Assets ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
+            xaxis_title='Year', yaxis_title='Annual Assets ($)'
         )
-        if show_refinance and refi_start_date:
-            fig_assets.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_assets.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_assets.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_assets, use_container_width=True)
 
     with tab_cumulative:
@@ -1348,39 +1819,27 @@ with st.container(border=True):
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Assets": cost_comparison_df["Buying Total Assets"].cumsum(), "Type": "Buying"}),
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Assets": cost_comparison_df["Renting Total Assets"].cumsum(), "Type": "Renting"})
         ], ignore_index=True)
-        fig_cum_assets = px.line(cum_asset_data, x='Year', y='Assets', color='Type', markers=True)
+        fig_cum_assets = px.line(cum_asset_data, x='Year', y='Assets', color='Type', markers=True, render_mode='webgl')
         fig_cum_assets.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Cumulative Assets ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
+            xaxis_title='Year', yaxis_title='Cumulative Assets ($)'
         )
-        if show_refinance and refi_start_date:
-            fig_cum_assets.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_cum_assets.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_cum_assets.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_cum_assets, use_container_width=True)
 
     with tab_pct_diff:
         st.markdown("**Asset % Difference**: Percentage difference between buying and renting assets, calculated as ((Buying Assets - Renting Assets) / Renting Assets) * 100.")
         asset_pct_diff = pd.DataFrame({
             "Year": cost_comparison_df["Year"],
-            "Asset % Difference": ((cost_comparison_df["Buying Total Assets"] - cost_comparison_df["Renting Total Assets"]) / cost_comparison_df["Renting Total Assets"].replace(0, np.nan)) * 100
+            "Asset % Difference": _percent_difference(cost_comparison_df["Buying Total Assets"], cost_comparison_df["Renting Total Assets"])
         })
-        asset_pct_diff["Asset % Difference"] = asset_pct_diff["Asset % Difference"].fillna(0)  # Handle division by zero
-        fig_asset_pct_diff = px.line(asset_pct_diff, x='Year', y='Asset % Difference', markers=True)
+        fig_asset_pct_diff = px.line(asset_pct_diff, x='Year', y='Asset % Difference', markers=True, render_mode='webgl')
         fig_asset_pct_diff.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
             xaxis_title='Year', yaxis_title='Asset % Difference (Buy - Rent) / Rent (%)',
             showlegend=False
         )
-        if show_refinance and refi_start_date:
-            fig_asset_pct_diff.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_asset_pct_diff.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_asset_pct_diff.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_asset_pct_diff, use_container_width=True)
         st.markdown("**Note**: Zero values indicate no renting assets for that year, preventing division by zero.")
 
@@ -1393,35 +1852,25 @@ with st.container(border=True):
     buy_cost_cols = ['Direct Costs (P&I)', 'PMI', 'Property Taxes', 'Home Insurance', 'Maintenance', 'Emergency', 'HOA Fees', 'Closing Costs', 'Points Costs']
     rent_cost_cols = ['Rent', 'Renters Insurance', 'Security Deposit', 'Utilities', 'Pet Fees', 'Application Fee', 'Lease Renewal Fee', 'Parking Fee']
     
-    buy_cost_df = cost_comparison_df[cost_comparison_df['Year'] == selected_year][buy_cost_cols].melt(var_name='Item', value_name='Value')
-    buy_cost_df = buy_cost_df[buy_cost_df['Value'] > 0]
+    buy_cost_df = pd.DataFrame({'Item': buy_cost_cols, 'Value': selected_row[buy_cost_cols].to_numpy(dtype=float)})
+    buy_cost_df = buy_cost_df[buy_cost_df['Value'] > 0].reset_index(drop=True)
     total_buy_cost = buy_cost_df['Value'].sum()
     buy_cost_df['% of Total'] = (buy_cost_df['Value'] / total_buy_cost * 100) if total_buy_cost > 0 else 0
-    total_buy_cost_row = pd.DataFrame({"Item": ["Total"], "Value": [total_buy_cost], "% of Total": [100.0]})
-    buy_cost_df = pd.concat([buy_cost_df, total_buy_cost_row], ignore_index=True)
+    buy_cost_df.loc[len(buy_cost_df)] = ['Total', total_buy_cost, 100.0]
 
-    rent_cost_df = cost_comparison_df[cost_comparison_df['Year'] == selected_year][rent_cost_cols].melt(var_name='Item', value_name='Value')
-    rent_cost_df = rent_cost_df[rent_cost_df['Value'] > 0]
+    rent_cost_df = pd.DataFrame({'Item': rent_cost_cols, 'Value': selected_row[rent_cost_cols].to_numpy(dtype=float)})
+    rent_cost_df = rent_cost_df[rent_cost_df['Value'] > 0].reset_index(drop=True)
     total_rent_cost = rent_cost_df['Value'].sum()
     rent_cost_df['% of Total'] = (rent_cost_df['Value'] / total_rent_cost * 100) if total_rent_cost > 0 else 0
-    total_rent_cost_row = pd.DataFrame({"Item": ["Total"], "Value": [total_rent_cost], "% of Total": [100.0]})
-    rent_cost_df = pd.concat([rent_cost_df, total_rent_cost_row], ignore_index=True)
+    rent_cost_df.loc[len(rent_cost_df)] = ['Total', total_rent_cost, 100.0]
 
     buy_col, rent_col = st.columns(2)
     with buy_col:
         st.markdown(f"### Buying Costs ({selected_year})")
-        st.dataframe(
-            buy_cost_df.style.format({"Value": "${:,.2f}", "% of Total": "{:.2f}%"})
-            .apply(lambda row: ["background-color: #e6f3ff" if row["Item"] == "Total" else ""] * len(row), axis=1),
-            hide_index=True
-        )
+        st.dataframe(buy_cost_df, column_config=breakdown_columns, hide_index=True)
     with rent_col:
         st.markdown(f"### Renting Costs ({selected_year})")
-        st.dataframe(
-            rent_cost_df.style.format({"Value": "${:,.2f}", "% of Total": "{:.2f}%"})
-            .apply(lambda row: ["background-color: #e6f3ff" if row["Item"] == "Total" else ""] * len(row), axis=1),
-            hide_index=True
-        )
+        st.dataframe(rent_cost_df, column_config=breakdown_columns, hide_index=True)
 
 # Costs Section
 st.header("Projected Costs")
@@ -1434,18 +1883,12 @@ with st.container(border=True):
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Cost": cost_comparison_df["Total Buying Cost"], "Type": "Buying"}),
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Cost": cost_comparison_df["Total Renting Cost"], "Type": "Renting"})
         ], ignore_index=True)
-        fig_costs = px.line(cost_data, x='Year', y='Cost', color='Type', markers=True)
+        fig_costs = px.line(cost_data, x='Year', y='Cost', color='Type', markers=True, render_mode='webgl')
         fig_costs.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Annual Cost ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
+            xaxis_title='Year', yaxis_title='Annual Cost ($)'
         )
-        if show_refinance and refi_start_date:
-            fig_costs.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_costs.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_costs.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_costs, use_container_width=True)
 
     with tab_cum:
@@ -1454,39 +1897,27 @@ with st.container(border=True):
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Cost": cost_comparison_df["Cumulative Buying Cost"], "Type": "Buying"}),
             pd.DataFrame({"Year": cost_comparison_df["Year"], "Cost": cost_comparison_df["Cumulative Renting Cost"], "Type": "Renting"})
         ], ignore_index=True)
-        fig_cum_costs = px.line(cum_cost_data, x='Year', y='Cost', color='Type', markers=True)
+        fig_cum_costs = px.line(cum_cost_data, x='Year', y='Cost', color='Type', markers=True, render_mode='webgl')
         fig_cum_costs.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Cumulative Cost ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
+            xaxis_title='Year', yaxis_title='Cumulative Cost ($)'
         )
-        if show_refinance and refi_start_date:
-            fig_cum_costs.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_cum_costs.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_cum_costs.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_cum_costs, use_container_width=True)
 
     with tab_pct_diff:
         st.markdown("**Cost % Difference**: Percentage difference between buying and renting costs, calculated as ((Buying Cost - Renting Cost) / Renting Cost) * 100.")
         cost_pct_diff = pd.DataFrame({
             "Year": cost_comparison_df["Year"],
-            "Cost % Difference": ((cost_comparison_df["Total Buying Cost"] - cost_comparison_df["Total Renting Cost"]) / cost_comparison_df["Total Renting Cost"].replace(0, np.nan)) * 100
+            "Cost % Difference": _percent_difference(cost_comparison_df["Total Buying Cost"], cost_comparison_df["Total Renting Cost"])
         })
-        cost_pct_diff["Cost % Difference"] = cost_pct_diff["Cost % Difference"].fillna(0)  # Handle division by zero
-        fig_cost_pct_diff = px.line(cost_pct_diff, x='Year', y='Cost % Difference', markers=True)
+        fig_cost_pct_diff = px.line(cost_pct_diff, x='Year', y='Cost % Difference', markers=True, render_mode='webgl')
         fig_cost_pct_diff.update_layout(
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
             xaxis_title='Year', yaxis_title='Cost % Difference (Buy - Rent) / Rent (%)',
             showlegend=False
         )
-        if show_refinance and refi_start_date:
-            fig_cost_pct_diff.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_cost_pct_diff.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_cost_pct_diff.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_cost_pct_diff, use_container_width=True)
         st.markdown("**Note**: Zero values indicate no renting costs for that year, preventing division by zero.")
 
@@ -1494,63 +1925,62 @@ with st.container(border=True):
 st.header("One-time vs. Repeating Costs")
 st.markdown("Compare one-time (e.g., closing costs, security deposit) and repeating (e.g., P&I, rent) costs over time.")
 with st.container(border=True):
+    # Row sums over the raw column blocks rather than chained Series additions
+    cost_years = cost_comparison_df['Year'].to_numpy()
     buy_cost_types = pd.DataFrame({
-        'Year': cost_comparison_df['Year'],
-        'One-time': cost_comparison_df['Closing Costs'] + cost_comparison_df['Points Costs'] + cost_comparison_df['Emergency'],
-        'Repeating': cost_comparison_df['Direct Costs (P&I)'] + cost_comparison_df['PMI'] + cost_comparison_df['Property Taxes'] + cost_comparison_df['Home Insurance'] + cost_comparison_df['Maintenance'] + cost_comparison_df['HOA Fees']
+        'Year': cost_years,
+        'One-time': cost_comparison_df[['Closing Costs', 'Points Costs', 'Emergency']].to_numpy(dtype=float).sum(axis=1),
+        'Repeating': cost_comparison_df[['Direct Costs (P&I)', 'PMI', 'Property Taxes', 'Home Insurance', 'Maintenance', 'HOA Fees']].to_numpy(dtype=float).sum(axis=1)
     })
+    # Pet fees count as one-time or repeating depending on their frequency
+    pet_one_time = float(pet_fee_frequency == "One-time")
+    pet_repeating = float(pet_fee_frequency == "Annual")
+    pet_fees = cost_comparison_df['Pet Fees'].to_numpy(dtype=float)
     rent_cost_types = pd.DataFrame({
-        'Year': cost_comparison_df['Year'],
-        'One-time': cost_comparison_df['Security Deposit'] + cost_comparison_df['Application Fee'] + (cost_comparison_df['Pet Fees'] if pet_fee_frequency == "One-time" else 0),
-        'Repeating': cost_comparison_df['Rent'] + cost_comparison_df['Renters Insurance'] + cost_comparison_df['Utilities'] + cost_comparison_df['Lease Renewal Fee'] + cost_comparison_df['Parking Fee'] + (cost_comparison_df['Pet Fees'] if pet_fee_frequency == "Annual" else 0)
+        'Year': cost_years,
+        'One-time': cost_comparison_df[['Security Deposit', 'Application Fee']].to_numpy(dtype=float).sum(axis=1) + pet_fees * pet_one_time,
+        'Repeating': cost_comparison_df[['Rent', 'Renters Insurance', 'Utilities', 'Lease Renewal Fee', 'Parking Fee']].to_numpy(dtype=float).sum(axis=1) + pet_fees * pet_repeating
     })
 
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### Buying Costs")
-        fig_buy_cost_types = go.Figure()
-        fig_buy_cost_types.add_trace(go.Bar(x=buy_cost_types['Year'], y=buy_cost_types['One-time'], name='One-time'))
-        fig_buy_cost_types.add_trace(go.Bar(x=buy_cost_types['Year'], y=buy_cost_types['Repeating'], name='Repeating'))
+        fig_buy_cost_types = go.Figure(data=[
+            go.Bar(x=buy_cost_types['Year'], y=buy_cost_types['One-time'], name='One-time'),
+            go.Bar(x=buy_cost_types['Year'], y=buy_cost_types['Repeating'], name='Repeating'),
+        ])
         fig_buy_cost_types.update_layout(
             barmode='stack',
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Cost ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            shapes=timeline_shapes, annotations=timeline_annotations,
+            xaxis_title='Year', yaxis_title='Cost ($)'
         )
-        if show_refinance and refi_start_date:
-            fig_buy_cost_types.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange", annotation_text="Refinance")
-        if purchase_year and eval_start_year <= purchase_year <= eval_end_year:
-            fig_buy_cost_types.add_vline(x=purchase_year, line_dash="dash", line_color="blue", annotation_text="Purchase")
-        if payoff_year and eval_start_year <= payoff_year <= eval_end_year:
-            fig_buy_cost_types.add_vline(x=payoff_year, line_dash="dash", line_color="purple", annotation_text="Payoff")
         st.plotly_chart(fig_buy_cost_types, use_container_width=True)
 
     with col2:
         st.markdown("### Renting Costs")
-        fig_rent_cost_types = go.Figure()
-        fig_rent_cost_types.add_trace(go.Bar(x=rent_cost_types['Year'], y=rent_cost_types['One-time'], name='One-time'))
-        fig_rent_cost_types.add_trace(go.Bar(x=rent_cost_types['Year'], y=rent_cost_types['Repeating'], name='Repeating'))
+        fig_rent_cost_types = go.Figure(data=[
+            go.Bar(x=rent_cost_types['Year'], y=rent_cost_types['One-time'], name='One-time'),
+            go.Bar(x=rent_cost_types['Year'], y=rent_cost_types['Repeating'], name='Repeating'),
+        ])
         fig_rent_cost_types.update_layout(
             barmode='stack',
-            plot_bgcolor="rgb(245, 245, 245)", paper_bgcolor="rgb(245, 245, 245)",
-            xaxis_title='Year', yaxis_title='Cost ($)',
-            legend=dict(yanchor="top", y=1.1, xanchor="left", x=0)
+            **_CHART_LAYOUT,
+            xaxis_title='Year', yaxis_title='Cost ($)'
         )
         st.plotly_chart(fig_rent_cost_types, use_container_width=True)
 
     
 with st.expander("Detailed Costs Breakdown by Year (Rent & Buy)", expanded=False):
     cost_breakout = cost_comparison_df[['Year', 'Direct Costs (P&I)', 'PMI', 'Property Taxes', 'Home Insurance', 'Maintenance', 'Emergency', 'HOA Fees', 'Closing Costs', 'Points Costs', 'Total Buying Cost', 'Rent', 'Renters Insurance', 'Security Deposit', 'Utilities', 'Pet Fees', 'Application Fee', 'Lease Renewal Fee', 'Parking Fee', 'Total Renting Cost', 'Cost Difference (Buy - Rent)']]
-    cost_breakout['Year'] = cost_breakout['Year'].astype(str)
     buy_cols = ['Direct Costs (P&I)', 'PMI', 'Property Taxes', 'Home Insurance', 'Maintenance', 'Emergency', 'HOA Fees', 'Closing Costs', 'Points Costs', 'Total Buying Cost']
     rent_cols = ['Rent', 'Renters Insurance', 'Security Deposit', 'Utilities', 'Pet Fees', 'Application Fee', 'Lease Renewal Fee', 'Parking Fee', 'Total Renting Cost']
-    st.dataframe(
-        cost_breakout.style
-            .format({col: "${:,.2f}" for col in cost_breakout.columns if col != 'Year'})
-            .set_properties(subset=buy_cols, **{'background-color': '#eef2ff'})
-            .set_properties(subset=rent_cols, **{'background-color': '#f5f5f5'}),
-        hide_index=True
-    )
+    # Formats live in column_config so the frontend formats cells; the buy/rent grouping moves to the column tooltips
+    breakout_columns = {"Year": st.column_config.NumberColumn("Year", format="%d")}
+    breakout_columns.update({col: st.column_config.NumberColumn(col, format="dollar", help="Buying cost") for col in buy_cols})
+    breakout_columns.update({col: st.column_config.NumberColumn(col, format="dollar", help="Renting cost") for col in rent_cols})
+    breakout_columns["Cost Difference (Buy - Rent)"] = st.column_config.NumberColumn("Cost Difference (Buy - Rent)", format="dollar")
+    st.dataframe(cost_breakout, column_config=breakout_columns, hide_index=True)
 
 thick_divider()
 
@@ -1564,23 +1994,25 @@ with st.container(border=True):
         "Rent — Total Assets": ("Renting Total Assets", "Assets", "Rent"),
         "Buy — Cumulative Costs": ("Cumulative Buying Cost", "Costs", "Buy"),
         "Rent — Cumulative Costs": ("Cumulative Renting Cost", "Costs", "Rent"),
-        "Buy — Net Assets": ("Buying Total Assets", "Net", "Buy"),
-        "Rent — Net Assets": ("Renting Total Assets", "Net", "Rent"),
+        "Buy — Net Assets": ("Buying Net Assets", "Net Assets", "Buy"),
+        "Rent — Net Assets": ("Renting Net Assets", "Net Assets", "Rent"),
     }
     selected = st.multiselect("Select lines to display", list(options.keys()), ["Buy — Net Assets"])
-    long_df = []
+    # Long format built column-wise: one values block and one label per selected series
+    nav_years = cost_comparison_df["Year"].to_numpy()
+    nav_values = []
+    nav_labels = []
     for key in selected:
         col_name, kind, side = options[key]
-        if kind == "Net":
-            vals = (cost_comparison_df["Buying Total Assets"] - cost_comparison_df["Cumulative Buying Cost"]) if side == "Buy" else (cost_comparison_df["Renting Total Assets"] - cost_comparison_df["Cumulative Renting Cost"])
-            label = f"{side} — Net Assets"
-        else:
-            vals = cost_comparison_df[col_name]
-            label = f"{side} — {kind}"
-        long_df.append(pd.DataFrame({"Year": cost_comparison_df["Year"], "Value": vals, "Series": label}))
-    nav_long = pd.concat(long_df, ignore_index=True) if long_df else pd.DataFrame(columns=["Year","Value","Series"])
-    fig_nav = px.line(nav_long, x="Year", y="Value", color="Series", markers=True)
-    fig_nav.update_layout(plot_bgcolor="rgb(245,245,245)", paper_bgcolor="rgb(245,245,245)")
+        nav_values.append(cost_comparison_df[col_name].to_numpy(dtype=float))
+        nav_labels.append(f"{side} — {kind}")
+    nav_long = pd.DataFrame({
+        "Year": np.tile(nav_years, len(nav_labels)),
+        "Value": np.concatenate(nav_values) if nav_values else np.empty(0),
+        "Series": np.repeat(np.array(nav_labels, dtype=object), len(nav_years)),
+    })
+    fig_nav = px.line(nav_long, x="Year", y="Value", color="Series", markers=True, render_mode="webgl")
+    fig_nav.update_layout(**_CHART_LAYOUT)
     st.plotly_chart(fig_nav, use_container_width=True)
 
 
@@ -1610,12 +2042,19 @@ with st.container(border=True):
         ln_mean = st.number_input("Housing annual mean (%)", value=st.session_state.get("housing_mean_pct", 3.0), step=0.1, key="ln_mean_pct")
         ln_std  = st.number_input("Housing annual std. dev. (%)", value=st.session_state.get("housing_std_pct", 8.0), step=0.5, key="ln_std_pct")
 
+    if rng_seed_one.strip():
+        try:
+            seed_val = int(rng_seed_one.strip())
+        except:
+            seed_val = None
+    else:
+    # if empty string, we keep None for non-deterministic run
+        seed_val = None
+
     st.subheader("Distributions (based on your parameters)")
-    rng_vis = np.random.default_rng(seed_val if "seed_val" in globals() and seed_val is not None else None)
-    vis_bro = sample_t_returns(10000, t_mean, t_std, t_df, rng_vis)
-    vis_home = sample_lognormal_returns(10000, ln_mean, ln_std, rng_vis)
-    fig_d1 = px.histogram(x=vis_bro*100, nbins=60, title="Brokerage: t-distribution (annual %)", labels={'x':'% return'})
-    fig_d2 = px.histogram(x=vis_home*100, nbins=60, title="Housing: lognormal (annual %)", labels={'x':'% return'})
+    (bro_counts, bro_edges), (home_counts, home_edges) = distribution_histograms(t_mean, t_std, t_df, ln_mean, ln_std, seed_val)
+    fig_d1 = _histogram_figure(bro_counts, bro_edges, "Brokerage: t-distribution (annual %)")
+    fig_d2 = _histogram_figure(home_counts, home_edges, "Housing: lognormal (annual %)")
     st.plotly_chart(fig_d1, use_container_width=True)
     st.plotly_chart(fig_d2, use_container_width=True)
     st.caption("t-distribution is scaled to your mean & stdev; housing uses a lognormal on gross (1+r) with parameters fitted from your mean & stdev.")
@@ -1632,34 +2071,7 @@ with st.container(border=True):
             years_list = list(range(1, int(n_years_sim)+1))
     n_years = len(years_list)
 
-    # Helpers to align with requested parameterization
-    def sample_t_returns(n, mean_pct, std_pct, df, rng):
-        mean = mean_pct/100.0
-        std  = std_pct/100.0
-        # standard Student t: var = df/(df-2). Scale to unit variance then to target std.
-        t = rng.standard_t(df, size=n)
-        t_unit = t * np.sqrt((df-2)/df)
-        return mean + std * t_unit
-
-    def sample_lognormal_returns(n, mean_pct, std_pct, rng):
-        # Fit lognormal for gross 1+r given arithmetic mean/stdev of r
-        m = 1.0 + mean_pct/100.0
-        s = std_pct/100.0
-        sigma2 = np.log(1 + (s**2)/(m**2))
-        sigma = np.sqrt(sigma2)
-        mu = np.log(m) - 0.5*sigma2
-        gross = rng.lognormal(mean=mu, sigma=sigma, size=n)
-        return gross - 1.0
-
     # Single-path RNG
-    if rng_seed_one.strip():
-        try:
-            seed_val = int(rng_seed_one.strip())
-        except:
-            seed_val = None
-    else:
-    # if empty string, we keep None for non-deterministic run
-        seed_val = None
     rng = np.random.default_rng(seed_val)
 
     bro_ret = sample_t_returns(n_years, t_mean, t_std, t_df, rng)
@@ -1703,116 +2115,56 @@ with st.container(border=True):
             else:
                 annual_df["Date"] = pd.date_range(start=start_date, periods=len(annual_df), freq="Y")
 
-    home_value = float(purchase_price) if 'purchase_price' in globals() else 0.0
-    base_home_value = float(purchase_price) if 'purchase_price' in globals() else 0.0
-    buy_investment = 0.0    # brokerage associated to Buy scenario (from cost differences)
-    rent_investment = float(down_payment if 'down_payment' in globals() else 0.0) + float(security_deposit if 'security_deposit' in globals() else 0.0)
-
-    buy_nw_path = []
-    rent_nw_path = []
-    comp_down = []
-    comp_amort = []
-    comp_extra = []
-    comp_apprec = []
-    comp_broker = []
+    # Starting home value and renter brokerage balance (shared with the Monte Carlo below)
+    sim_home_value0 = float(purchase_price) if 'purchase_price' in globals() else 0.0
+    sim_rent_investment0 = float(down_payment if 'down_payment' in globals() else 0.0) + float(security_deposit if 'security_deposit' in globals() else 0.0)
 
     # ---------- Single-path engine (stochastic) ----------
 
-    for i, year in enumerate(years_list):
-        # Mortgage-linked items for this calendar year
-        if 'Date' in annual_df.columns and not annual_df.empty and year in annual_df["Date"].dt.year.values:
-            mask = (annual_df["Date"].dt.year == year)
-            p_and_i = annual_df.loc[mask, "P&I"].sum() if "P&I" in annual_df.columns else 0.0
-            pmi = annual_df.loc[mask, "PMI"].sum() if "PMI" in annual_df.columns else 0.0
-            year_balance = annual_df.loc[mask, "Balance"].iloc[-1] if "Balance" in annual_df.columns else 0.0
-            extra_prin = annual_df.loc[mask, "Extra Principal Payments"].sum() if "Extra Principal Payments" in annual_df.columns else 0.0
-            sched_prin = annual_df.loc[mask, "Principal"].sum() if "Principal" in annual_df.columns else 0.0
-        else:
-            p_and_i = 0.0; pmi = 0.0; year_balance = 0.0; extra_prin = 0.0; sched_prin = 0.0
-
-        # Indirect/recurring housing costs (deterministic inflation, baseline)
-        def _infl(base, pct, yrs):
-            try:
-                return float(base) * ((1 + float(pct)/100.0) ** float(yrs))
-            except Exception:
-                return 0.0
-
-        yr_idx = i if 'purchase_year' not in globals() else (year - purchase_year)
-        year_taxes = _infl(taxes if 'taxes' in globals() else 0.0, annual_property_tax_increase if 'annual_property_tax_increase' in globals() else 0.0, yr_idx)
-        year_insurance = _infl(insurance if 'insurance' in globals() else 0.0, annual_insurance_increase if 'annual_insurance_increase' in globals() else 0.0, yr_idx)
-        year_maintenance = _infl(maintenance if 'maintenance' in globals() else 0.0, annual_maintenance_increase if 'annual_maintenance_increase' in globals() else 0.0, yr_idx)
-        year_hoa = _infl(hoa if 'hoa' in globals() else 0.0, annual_hoa_increase if 'annual_hoa_increase' in globals() else 0.0, yr_idx)
-
-        # One-time costs treated as homeowner costs regardless of financing (opportunity cost)
-        add_purchase_closing = float(closing_costs if 'closing_costs' in globals() else 0.0) if (('purchase_year' in globals()) and (year == purchase_year)) else 0.0
-        add_purchase_points  = float(points_cost if 'points_cost' in globals() else 0.0) if (('purchase_year' in globals()) and (year == purchase_year)) else 0.0
-        add_refi_points = 0.0
-        try:
-            if 'show_refinance' in globals() and show_refinance and 'refi_start_date' in globals() and refi_start_date and refi_start_date.year == year:
-                add_refi_points = float(refi_points_cost) if 'refi_points_cost' in globals() else float(refi_costs) if 'refi_costs' in globals() else 0.0
-        except Exception:
-            pass
-
-        indirect_costs = pmi + year_taxes + year_insurance + year_maintenance + year_hoa + add_purchase_closing + add_purchase_points + add_refi_points
-        buy_cost = p_and_i + indirect_costs
-
-        # Renting costs
-        year_rent = float(current_rent) * 12.0
-        year_renters_insurance = float(current_renters_insurance)
-        year_deposit = float(current_deposit) if year == years_list[0] else 0.0
-        year_utilities = float(current_utilities)
-        year_pet_fee = float(current_pet_fee) if (('pet_fee_frequency' in globals() and pet_fee_frequency=='Annual') or (year==years_list[0])) else 0.0
-        year_application_fee = float(application_fee) if 'application_fee' in globals() and year == years_list[0] else 0.0
-        year_renewal_fee = float(lease_renewal_fee) if 'lease_renewal_fee' in globals() and year > years_list[0] else 0.0
-        year_parking = float(current_parking)
-
-        rent_cost = year_rent + year_renters_insurance + year_deposit + year_utilities + year_pet_fee + year_application_fee + year_renewal_fee + year_parking
-
-        # Update home value stochastically
-        home_value *= (1 + home_ret[i])
-
-        # Equity composition
-        equity_principal = float(purchase_price if 'purchase_price' in globals() else 0.0) - float(year_balance)
-        appreciation = home_value - base_home_value
-        equity_total = equity_principal + max(0.0, appreciation)
-
-        # Invest cost differences using SAME brokerage draw (apples-to-apples)
-        r_b = bro_ret[i]
-        if buy_cost > rent_cost:
-            rent_investment = rent_investment * (1 + r_b) + (buy_cost - rent_cost)
-            buy_investment = buy_investment * (1 + r_b)
-        else:
-            buy_investment = buy_investment * (1 + r_b) + (rent_cost - buy_cost)
-            rent_investment = rent_investment * (1 + r_b)
-
-        buy_total_assets = equity_total + buy_investment
-        rent_total_assets = rent_investment
-
-        buy_nw_path.append(buy_total_assets)
-        rent_nw_path.append(rent_total_assets)
-
-        comp_down.append(float(down_payment) if 'down_payment' in globals() else 0.0 if i>0 else float(down_payment) if 'down_payment' in globals() else 0.0)
-        comp_amort.append(max(0.0, equity_principal))
-        comp_extra.append(float(extra_prin))
-        comp_apprec.append(max(0.0, appreciation))
-        comp_broker.append(max(0.0, buy_investment))
-
-        # Inflate renter side items for next year
-        infl = (1 + float(annual_rent_increase if 'annual_rent_increase' in globals() else 0.0) / 100.0)
-        current_rent *= infl
-        current_renters_insurance *= infl
-        current_utilities *= infl
-        current_parking *= infl
-        if 'pet_fee_frequency' in globals() and pet_fee_frequency == "Annual":
-            current_pet_fee *= infl
+    # Deterministic per-year costs and balance (shared with the Monte Carlo below)
+    sim_buy_cost, sim_rent_cost, sim_balance = calculate_simulation_costs(
+        annual_df,
+        tuple(years_list),
+        purchase_year,
+        taxes if 'taxes' in globals() else 0.0,
+        insurance if 'insurance' in globals() else 0.0,
+        maintenance if 'maintenance' in globals() else 0.0,
+        hoa if 'hoa' in globals() else 0.0,
+        annual_property_tax_increase if 'annual_property_tax_increase' in globals() else 0.0,
+        annual_insurance_increase if 'annual_insurance_increase' in globals() else 0.0,
+        annual_maintenance_increase if 'annual_maintenance_increase' in globals() else 0.0,
+        annual_hoa_increase if 'annual_hoa_increase' in globals() else 0.0,
+        closing_costs,
+        points_cost,
+        refi_year,
+        refi_points_cost,
+        current_rent,
+        current_renters_insurance,
+        current_deposit,
+        current_utilities,
+        current_pet_fee,
+        pet_fee_frequency == "Annual",
+        application_fee,
+        lease_renewal_fee,
+        current_parking,
+        annual_rent_increase
+    )
+
+    # The single path is the Monte Carlo recurrence for one trial, so it reuses the compiled kernel
+    single_buy_paths, single_rent_paths = _mc_paths_kernel(
+        bro_ret[np.newaxis, :], home_ret[np.newaxis, :], sim_buy_cost, sim_rent_cost, sim_balance,
+        sim_home_value0, sim_rent_investment0
+    )
+    buy_nw_path, rent_nw_path = single_buy_paths[0], single_rent_paths[0]
 
     # ---------------- Visuals: Single-path ----------------
     x = years_list
-    fig_one = go.Figure()
-    fig_one.add_trace(go.Scatter(x=x, y=buy_nw_path, mode="lines", name="Buy — Net Worth (stochastic)"))
-    fig_one.add_trace(go.Scatter(x=x, y=rent_nw_path, mode="lines", name="Rent — Net Worth (stochastic)"))
-    if 'refi_start_date' in globals() and refi_start_date:
-        fig_one.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange")
+    fig_one = go.Figure(data=[
+        go.Scattergl(x=x, y=buy_nw_path, mode="lines", name="Buy — Net Worth (stochastic)"),
+        go.Scattergl(x=x, y=rent_nw_path, mode="lines", name="Rent — Net Worth (stochastic)"),
+    ])
+    if refi_year is not None:
+        fig_one.add_vline(x=refi_year, line_dash="dash", line_color="orange")
     if 'purchase_year' in globals():
         fig_one.add_vline(x=purchase_year, line_dash="dash", line_color="blue")
     st.plotly_chart(fig_one, use_container_width=True)
@@ -1844,130 +2196,46 @@ with st.container(border=True):
         st.info("Primary chart shows **Buy probability** each year. Rent probability = 1 − Buy.")
     if n_trials > 10000:
         st.warning("High trial count may be slow. Consider using a seed for reproducibility.")
-    if not run_mc:
+    # Everything the run depends on except the seed; costs, balance and starting values are the single-path engine's
+    mc_inputs = (
+        n_trials, t_mean, t_std, t_df, ln_mean, ln_std,
+        sim_buy_cost, sim_rent_cost, sim_balance, sim_home_value0, sim_rent_investment0
+    )
+    # Hashable fingerprint of those inputs plus the seed text, compared against the last run's
+    mc_fingerprint = (
+        mc_inputs[:6] + tuple(np.concatenate(mc_inputs[6:9]).tolist()) + mc_inputs[9:],
+        seed_text.strip()
+    )
+    last_mc_run = st.session_state.get("mc_last_run")
+    if run_mc:
+        try:
+            seed_mc = int(seed_text.strip()) if seed_text.strip() else None
+        except:
+            seed_mc = None
+        if seed_mc is None:
+            # Fresh entropy keeps unseeded runs random while still giving the cached run a key
+            seed_mc = np.random.SeedSequence().entropy
+        st.session_state["mc_last_run"] = (mc_fingerprint, seed_mc)
+    elif last_mc_run is not None and last_mc_run[0] == mc_fingerprint:
+        # Same inputs as the last run: its seed hits the run_monte_carlo cache, so this costs nothing
+        seed_mc = last_mc_run[1]
+        st.caption("Parameters unchanged since the last run; showing those results.")
+    else:
         st.caption("Parameters changed or no run yet. Click **Run Monte Carlo with updated parameters** to refresh results.")
         st.stop()
-    try:
-        seed_mc = int(seed_text.strip()) if seed_text.strip() else None
-    except:
-        seed_mc = None
-    rng_mc = np.random.default_rng(seed_mc)
 
     years = years_list if 'years_list' in globals() else list(range(1, n_years+1))
-    T = len(years)
-
-    buy_gt_rent_counts = np.zeros(T, dtype=int)
-    buy_paths = np.zeros((n_trials, T))
-    rent_paths = np.zeros((n_trials, T))
-
-    progress = st.progress(0.0)
-
-    for t in range(n_trials):
-        bro = sample_t_returns(T, t_mean, t_std, t_df, rng_mc)
-        hom = sample_lognormal_returns(T, ln_mean, ln_std, rng_mc)
-
-        # Re-run the single-path engine fast for each trial
-        try:
-            current_rent = cost_of_rent
-            current_renters_insurance = renters_insurance
-            current_deposit = security_deposit
-            current_utilities = rental_utilities
-            current_pet_fee = pet_fee
-            current_parking = parking_fee
-        except Exception:
-            current_rent = 2000.0
-            current_renters_insurance = 300.0
-            current_deposit = 2000.0
-            current_utilities = 2000.0
-            current_pet_fee = 0.0
-            current_parking = 0.0
-
-        home_value = float(purchase_price) if 'purchase_price' in globals() else 0.0
-        base_home_value = home_value
-        buy_investment = 0.0
-        rent_investment = float(down_payment if 'down_payment' in globals() else 0.0) + float(security_deposit if 'security_deposit' in globals() else 0.0)
-
-        for i, year in enumerate(years):
-            if 'Date' in annual_df.columns and not annual_df.empty and year in annual_df["Date"].dt.year.values:
-                mask = (annual_df["Date"].dt.year == year)
-                p_and_i = annual_df.loc[mask, "P&I"].sum() if "P&I" in annual_df.columns else 0.0
-                pmi = annual_df.loc[mask, "PMI"].sum() if "PMI" in annual_df.columns else 0.0
-                year_balance = annual_df.loc[mask, "Balance"].iloc[-1] if "Balance" in annual_df.columns else 0.0
-            else:
-                p_and_i = 0.0; pmi = 0.0; year_balance = 0.0
-
-            def _infl(base, pct, yrs):
-                try:
-                    return float(base) * ((1 + float(pct)/100.0) ** float(yrs))
-                except Exception:
-                    return 0.0
-            yr_idx = i if 'purchase_year' not in globals() else (year - purchase_year)
-            year_taxes = _infl(taxes if 'taxes' in globals() else 0.0, annual_property_tax_increase if 'annual_property_tax_increase' in globals() else 0.0, yr_idx)
-            year_insurance = _infl(insurance if 'insurance' in globals() else 0.0, annual_insurance_increase if 'annual_insurance_increase' in globals() else 0.0, yr_idx)
-            year_maintenance = _infl(maintenance if 'maintenance' in globals() else 0.0, annual_maintenance_increase if 'annual_maintenance_increase' in globals() else 0.0, yr_idx)
-            year_hoa = _infl(hoa if 'hoa' in globals() else 0.0, annual_hoa_increase if 'annual_hoa_increase' in globals() else 0.0, yr_idx)
-
-            add_purchase_closing = float(closing_costs if 'closing_costs' in globals() else 0.0) if (('purchase_year' in globals()) and (year == purchase_year)) else 0.0
-            add_purchase_points  = float(points_cost if 'points_cost' in globals() else 0.0) if (('purchase_year' in globals()) and (year == purchase_year)) else 0.0
-            add_refi_points = 0.0
-            try:
-                if 'show_refinance' in globals() and show_refinance and 'refi_start_date' in globals() and refi_start_date and refi_start_date.year == year:
-                    add_refi_points = float(refi_points_cost) if 'refi_points_cost' in globals() else float(refi_costs) if 'refi_costs' in globals() else 0.0
-            except Exception:
-                pass
-
-            indirect_costs = pmi + year_taxes + year_insurance + year_maintenance + year_hoa + add_purchase_closing + add_purchase_points + add_refi_points
-            buy_cost = p_and_i + indirect_costs
-
-            year_rent = float(current_rent) * 12.0
-            year_renters_insurance = float(current_renters_insurance)
-            year_deposit = float(current_deposit) if year == years[0] else 0.0
-            year_utilities = float(current_utilities)
-            year_pet_fee = float(current_pet_fee) if (('pet_fee_frequency' in globals() and pet_fee_frequency=='Annual') or (year==years[0])) else 0.0
-            year_application_fee = float(application_fee) if 'application_fee' in globals() and year == years[0] else 0.0
-            year_renewal_fee = float(lease_renewal_fee) if 'lease_renewal_fee' in globals() and year > years[0] else 0.0
-            year_parking = float(current_parking)
-
-            rent_cost = year_rent + year_renters_insurance + year_deposit + year_utilities + year_pet_fee + year_application_fee + year_renewal_fee + year_parking
-
-            home_value *= (1 + hom[i])
-            equity_principal = float(purchase_price if 'purchase_price' in globals() else 0.0) - float(year_balance)
-            appreciation = home_value - base_home_value
-            equity_total = equity_principal + max(0.0, appreciation)
-
-            r_b = bro[i]
-            if buy_cost > rent_cost:
-                rent_investment = rent_investment * (1 + r_b) + (buy_cost - rent_cost)
-                buy_investment = buy_investment * (1 + r_b)
-            else:
-                buy_investment = buy_investment * (1 + r_b) + (rent_cost - buy_cost)
-                rent_investment = rent_investment * (1 + r_b)
-
-            buy_total_assets = equity_total + buy_investment
-            rent_total_assets = rent_investment
-
-            buy_paths[t, i] = buy_total_assets
-            rent_paths[t, i] = rent_total_assets
-
-            infl = (1 + float(annual_rent_increase if 'annual_rent_increase' in globals() else 0.0) / 100.0)
-            current_rent *= infl
-            current_renters_insurance *= infl
-            current_utilities *= infl
-            current_parking *= infl
-            if 'pet_fee_frequency' in globals() and pet_fee_frequency == "Annual":
-                current_pet_fee *= infl
 
-        buy_gt_rent_counts += (buy_paths[t] > rent_paths[t])
+    with st.spinner("Running Monte Carlo trials..."):
+        buy_paths, rent_paths = run_monte_carlo(n_trials, seed_mc, *mc_inputs[1:])
 
-        if (t+1) % max(1, n_trials//50) == 0:
-            progress.progress((t+1)/n_trials)
+    buy_gt_rent_counts = (buy_paths > rent_paths).sum(axis=0)
 
     # Probability that Buy > Rent each year (NEW)
     buy_prob = buy_gt_rent_counts / n_trials
-    fig_prob = go.Figure()
-    fig_prob.add_trace(go.Scatter(x=years, y=buy_prob, mode="lines", name="P(Buy beats Rent)"))
-    if 'refi_start_date' in globals() and refi_start_date:
-        fig_prob.add_vline(x=refi_start_date.year, line_dash="dash", line_color="orange")
+    fig_prob = go.Figure(go.Scattergl(x=years, y=buy_prob, mode="lines", name="P(Buy beats Rent)"))
+    if refi_year is not None:
+        fig_prob.add_vline(x=refi_year, line_dash="dash", line_color="orange")
     if 'purchase_year' in globals():
         fig_prob.add_vline(x=purchase_year, line_dash="dash", line_color="blue")
     st.plotly_chart(fig_prob, use_container_width=True)
@@ -1979,13 +2247,15 @@ with st.container(border=True):
         "% Buy Wins": (buy_paths > rent_paths).mean(axis=0) * 100.0,
         "% Rent Wins": (rent_paths > buy_paths).mean(axis=0) * 100.0
     })
-    fig_wins = px.line(df_wins.melt(id_vars=["Year"], var_name="Scenario", value_name="Percent"), x="Year", y="Percent", color="Scenario", markers=True, title="% of Trials Each Scenario Wins (per year)")
+    fig_wins = px.line(df_wins.melt(id_vars=["Year"], var_name="Scenario", value_name="Percent"), x="Year", y="Percent", color="Scenario", markers=True, render_mode="webgl", title="% of Trials Each Scenario Wins (per year)")
     st.plotly_chart(fig_wins, use_container_width=True)
 
     # Box & whisker plots of final-year net worth (from earlier version)
-    fig_box = go.Figure()
-    fig_box.add_trace(go.Box(y=buy_paths[:, -1], name="Buy — Net Worth (Final Year)"))
-    fig_box.add_trace(go.Box(y=rent_paths[:, -1], name="Rent — Net Worth (Final Year)"))
+    # boxpoints=False draws only the box summary instead of also plotting each trial's outlier point
+    fig_box = go.Figure(data=[
+        go.Box(y=buy_paths[:, -1], name="Buy — Net Worth (Final Year)", boxpoints=False),
+        go.Box(y=rent_paths[:, -1], name="Rent — Net Worth (Final Year)", boxpoints=False),
+    ])
     st.plotly_chart(fig_box, use_container_width=True)
 
     
\ No newline at end of file